@@ -1,123 +1,247 @@
 """
 BioVault Autonomous Agent Loop
 --------------------------------
-Runs as a daemon thread inside the FastAPI process (started in main.py lifespan).
+Runs as an asyncio task inside the FastAPI process (started in main.py lifespan).
 Never exits — polls the document queue every POLL_INTERVAL seconds forever.
 
-Every stage start/complete/flag is written to agent_log so the dashboard
-can show a live activity feed to judges watching in real time.
+Each tick claims up to BATCH_SIZE pending documents and runs their pipelines
+concurrently (bounded by MAX_CONCURRENCY). The workload is I/O-bound — both
+LLM calls, the webhook, and the DB writes spend their time waiting — so
+throughput scales with concurrency until the providers rate-limit.
+
+Every stage start/complete/flag lands in the in-memory live feed immediately
+(so the dashboard can show activity in real time) and is flushed to agent_log
+in one batch per document.
 """
 
+import asyncio
 import logging
-import os
-import threading
-import time
+from types import MappingProxyType
 
 import database as db
 from alerts import dispatch_alert
+from config import settings
+from pipeline import llm_cache, minimax_agent, akash_agent
+from pipeline.datadog_tracer import record_llm_call
+from pipeline.fhir_builder import build_fhir_bundle_cached
+from pipeline.validator import run_bundle_checks, run_data_checks, summarize_checks
 
 logger = logging.getLogger("biovault.agent")
 
-POLL_INTERVAL = int(os.getenv("POLL_INTERVAL_SECONDS", "30"))
-_stop_event = threading.Event()
+POLL_INTERVAL   = settings.poll_interval
+MAX_CONCURRENCY = settings.agent_concurrency
+BATCH_SIZE      = settings.agent_batch
+
+_stop_event = asyncio.Event()
+_semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+
+class _LazyFmt:
+    """
+    Defers str.format until the message is actually rendered — the DB flush
+    or a live-feed read. Entries that age out of the ring before anyone
+    reads them never pay for formatting.
+    """
+
+    __slots__ = ("fmt", "args")
+
+    def __init__(self, fmt: str, *args):
+        self.fmt = fmt
+        self.args = args
 
+    def __str__(self) -> str:
+        return self.fmt.format(*self.args)
 
-def run_agent_loop():
-    logger.info("Agent loop starting (poll_interval=%ds)", POLL_INTERVAL)
 
-    recovered = db.recover_stalled_documents()
+def _log(
+    log_buffer: list,
+    event: str,
+    message: str,
+    document_id: str = None,
+    stage: str = None,
+    level: str = "info",
+) -> None:
+    """
+    Buffer a pipeline log entry. It appears in the live activity feed
+    immediately; the durable DB write happens in one batch per document.
+    """
+    entry = {
+        "event": event, "message": message, "document_id": document_id,
+        "stage": stage, "level": level, "timestamp": db._now(),
+    }
+    db.append_live_log(entry)
+    log_buffer.append(entry)
+
+
+async def run_agent_loop():
+    logger.info(
+        "Agent loop starting (poll_interval=%ds, batch=%d, concurrency=%d)",
+        POLL_INTERVAL, BATCH_SIZE, MAX_CONCURRENCY,
+    )
+
+    recovered = await asyncio.to_thread(db.recover_stalled_documents)
     if recovered:
         msg = f"Fault recovery: reset {recovered} stalled doc(s) → pending"
         logger.warning(msg)
-        db.write_log("recovery", msg, level="warn")
+        await asyncio.to_thread(db.write_log, "recovery", msg, level="warn")
 
-    db.update_heartbeat()
-    db.write_log("startup", "Agent loop started — watching queue every %ds" % POLL_INTERVAL)
+    await asyncio.to_thread(db.update_heartbeat)
+    await asyncio.to_thread(
+        db.write_log, "startup",
+        "Agent loop started — watching queue every %ds" % POLL_INTERVAL,
+    )
 
     while not _stop_event.is_set():
         try:
-            _tick()
+            await _tick()
         except Exception as exc:
             logger.exception("Unhandled error in agent tick: %s", exc)
-            db.write_log("error", f"Unhandled tick error: {exc}", level="error")
-        _stop_event.wait(POLL_INTERVAL)
+            await asyncio.to_thread(
+                db.write_log, "error", f"Unhandled tick error: {exc}", level="error"
+            )
+        try:
+            await asyncio.wait_for(_stop_event.wait(), timeout=POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
 
     logger.info("Agent loop stopped.")
-    db.write_log("shutdown", "Agent loop stopped")
+    await asyncio.to_thread(db.write_log, "shutdown", "Agent loop stopped")
 
 
-def _tick():
-    db.update_heartbeat()
+async def _tick():
+    # Heartbeat counters are accumulated in memory and written once per
+    # tick (in the finally below) instead of 2-3 times per document
+    tick_stats = {"docs": 0, "flags": 0}
+    try:
+        batch = await asyncio.to_thread(db.claim_pending_batch, BATCH_SIZE)
+        if not batch:
+            await asyncio.to_thread(db.write_log, "idle", "Queue empty — waiting for documents")
+            return
+
+        await asyncio.gather(*[_process_document(row, tick_stats) for row in batch])
+    finally:
+        # Single write per tick: refreshes last_seen and applies the deltas
+        await asyncio.to_thread(
+            db.update_heartbeat,
+            docs_delta=tick_stats["docs"], flags_delta=tick_stats["flags"],
+        )
 
-    row = db.get_next_pending()
-    if row is None:
-        db.write_log("idle", "Queue empty — waiting for documents")
-        return
 
-    doc_id   = row["id"]
-    filename = row["filename"]
+async def _process_document(row: dict, tick_stats: dict):
+    """Run the full pipeline for one claimed document, bounded by the semaphore."""
+    doc_id    = row["id"]
+    filename  = row["filename"]
     file_path = row["file_path"]
 
-    logger.info("Processing document: id=%s filename=%s", doc_id, filename)
-    db.write_log("doc_start", f"Picked up: {filename}", document_id=doc_id)
-    db.set_document_status(doc_id, "processing")
-
-    try:
-        _run_pipeline(doc_id, filename, file_path)
-        db.set_document_status(doc_id, "complete")
-        db.update_heartbeat(docs_delta=1)
-        db.write_log("doc_complete", f"✅ Complete: {filename}", document_id=doc_id, level="success")
-        logger.info("Document complete: id=%s", doc_id)
-    except Exception as exc:
-        logger.exception("Pipeline failed for doc %s: %s", doc_id, exc)
-        db.set_document_status(doc_id, "failed", error=str(exc))
-        db.write_log("doc_failed", f"❌ Failed: {filename} — {exc}", document_id=doc_id, level="error")
-
-
-def _run_pipeline(doc_id: str, filename: str, file_path: str):
-    from pipeline import minimax_agent, akash_agent
-    from pipeline.validator import run_validation
-    from pipeline.fhir_builder import build_fhir_bundle
-    from pipeline.datadog_tracer import record_llm_call
+    async with _semaphore:
+        logger.info("Processing document: id=%s filename=%s", doc_id, filename)
+        log_buffer: list = []
+        _log(log_buffer, "doc_start", f"Picked up: {filename}", document_id=doc_id)
 
+        try:
+            await _run_pipeline(doc_id, filename, file_path, log_buffer, tick_stats)
+            await asyncio.to_thread(db.set_document_status, doc_id, "complete")
+            tick_stats["docs"] += 1
+            _log(log_buffer, "doc_complete", f"✅ Complete: {filename}",
+                 document_id=doc_id, level="success")
+            logger.info("Document complete: id=%s", doc_id)
+        except Exception as exc:
+            logger.exception("Pipeline failed for doc %s: %s", doc_id, exc)
+            await asyncio.to_thread(db.set_document_status, doc_id, "failed", error=str(exc))
+            _log(log_buffer, "doc_failed", f"❌ Failed: {filename} — {exc}",
+                 document_id=doc_id, level="error")
+        finally:
+            # Single batched flush of every log row this document produced
+            await asyncio.to_thread(db.write_logs_bulk, log_buffer)
+
+
+async def _run_pipeline(
+    doc_id: str, filename: str, file_path: str, log_buffer: list, tick_stats: dict,
+):
     # ── Stage 1: MiniMax Vision ───────────────────────────────────────────────
-    db.write_log("stage_start", "⏳ Stage 1/4 — MiniMax Vision extraction starting…",
-                 document_id=doc_id, stage="extraction")
-
-    minimax_result = minimax_agent.extract_from_image(
-        image_path=file_path,
-        tracer=record_llm_call,
-    )
+    _log(log_buffer, "stage_start", "⏳ Stage 1/4 — MiniMax Vision extraction starting…",
+         document_id=doc_id, stage="extraction")
+
+    file_bytes = await asyncio.to_thread(lambda: open(file_path, "rb").read())
+    file_hash  = llm_cache.hash_bytes(file_bytes)
+    stage1_key = llm_cache.make_key("minimax", minimax_agent.PROMPT_VERSION, file_hash)
+
+    cached_extraction = await asyncio.to_thread(llm_cache.get, stage1_key)
+    if cached_extraction is not None:
+        minimax_result = {
+            "extraction": cached_extraction,
+            "model": minimax_agent.MINIMAX_MODEL,
+            "latency_ms": 0,
+            "tokens_used": 0,
+            "cache": "hit",
+        }
+    else:
+        minimax_result = await asyncio.to_thread(
+            minimax_agent.extract_from_image,
+            image_path=file_path,
+            image_bytes=file_bytes,
+            tracer=record_llm_call,
+        )
+        await asyncio.to_thread(
+            llm_cache.set, stage1_key, minimax_result["extraction"],
+            stage="extraction", model=minimax_agent.MINIMAX_MODEL,
+            prompt_version=minimax_agent.PROMPT_VERSION,
+        )
     extraction = minimax_result["extraction"]
     cycles     = len(extraction.get("cycles", []))
     conf       = extraction.get("overall_confidence", 0)
 
-    db.insert_pipeline_result(
+    await asyncio.to_thread(
+        db.insert_pipeline_result,
         document_id=doc_id, stage="extraction",
         output=extraction, confidence=conf,
     )
-    db.write_log(
-        "stage_done",
-        f"✅ Stage 1/4 — Extraction complete: {cycles} cycles, "
-        f"confidence={conf:.0%}, latency={minimax_result['latency_ms']}ms",
-        document_id=doc_id, stage="extraction", level="success",
-    )
+    _log(log_buffer, "stage_done",
+         _LazyFmt("✅ Stage 1/4 — Extraction complete: {} cycles, "
+                  "confidence={:.0%}, latency={}ms",
+                  cycles, conf, minimax_result["latency_ms"]),
+         document_id=doc_id, stage="extraction", level="success")
 
     # ── Stage 2: AkashML Standardization ─────────────────────────────────────
-    db.write_log("stage_start", "⏳ Stage 2/4 — AkashML (MiniMax M2.5) standardization starting…",
-                 document_id=doc_id, stage="standardization")
+    _log(log_buffer, "stage_start",
+         "⏳ Stage 2/4 — AkashML (MiniMax M2.5) standardization starting…",
+         document_id=doc_id, stage="standardization")
 
-    akash_result  = akash_agent.standardize_extraction(raw_extraction=extraction, tracer=record_llm_call)
+    stage2_key = llm_cache.make_key(
+        "akash", akash_agent.PROMPT_VERSION, llm_cache.hash_json(extraction)
+    )
+    cached_standardized = await asyncio.to_thread(llm_cache.get, stage2_key)
+    if cached_standardized is not None:
+        akash_result = {
+            "standardized": cached_standardized,
+            "model": akash_agent.AKASH_MODEL,
+            "latency_ms": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cache": "hit",
+        }
+    else:
+        akash_result = await asyncio.to_thread(
+            akash_agent.standardize_extraction,
+            raw_extraction=extraction, tracer=record_llm_call,
+        )
+        await asyncio.to_thread(
+            llm_cache.set, stage2_key, akash_result["standardized"],
+            stage="standardization", model=akash_agent.AKASH_MODEL,
+            prompt_version=akash_agent.PROMPT_VERSION,
+        )
     standardized  = akash_result["standardized"]
     icd10_code    = standardized.get("icd10", {}).get("code", "?")
 
-    db.insert_pipeline_result(document_id=doc_id, stage="standardization", output=standardized)
-    db.write_log(
-        "stage_done",
-        f"✅ Stage 2/4 — Standardization complete: ICD-10={icd10_code}, "
-        f"latency={akash_result['latency_ms']}ms, tokens={akash_result['output_tokens']}",
-        document_id=doc_id, stage="standardization", level="success",
+    await asyncio.to_thread(
+        db.insert_pipeline_result,
+        document_id=doc_id, stage="standardization", output=standardized,
     )
+    _log(log_buffer, "stage_done",
+         _LazyFmt("✅ Stage 2/4 — Standardization complete: ICD-10={}, "
+                  "latency={}ms, tokens={}",
+                  icd10_code, akash_result["latency_ms"], akash_result["output_tokens"]),
+         document_id=doc_id, stage="standardization", level="success")
 
     # Escalate HIGH flags from LLM output immediately
     raw_flags     = standardized.get("safety_flags", [])
@@ -125,7 +249,8 @@ def _run_pipeline(doc_id: str, filename: str, file_path: str):
     for flag in raw_flags:
         severity = flag.get("severity", "LOW")
         if severity == "HIGH":
-            flag_id = db.insert_safety_flag(
+            flag_id = await asyncio.to_thread(
+                db.insert_safety_flag,
                 document_id=doc_id,
                 flag_type=flag.get("category", "OTHER"),
                 severity=severity,
@@ -133,11 +258,9 @@ def _run_pipeline(doc_id: str, filename: str, file_path: str):
             )
             critical_count += 1
             desc = flag.get("description", "")[:80]
-            db.write_log(
-                "flag",
-                f"⚠ HIGH flag: {flag.get('category','OTHER')} — {desc}",
-                document_id=doc_id, stage="standardization", level="warn",
-            )
+            _log(log_buffer, "flag",
+                 f"⚠ HIGH flag: {flag.get('category','OTHER')} — {desc}",
+                 document_id=doc_id, stage="standardization", level="warn")
             dispatch_alert(
                 doc_id=doc_id, filename=filename, flag_id=flag_id,
                 flag_type=flag.get("category", "OTHER"), severity=severity,
@@ -145,71 +268,84 @@ def _run_pipeline(doc_id: str, filename: str, file_path: str):
             )
 
     # ── Stage 3: FHIR R4 Bundle ───────────────────────────────────────────────
-    db.write_log("stage_start", "⏳ Stage 3/4 — Building FHIR R4 bundle…",
-                 document_id=doc_id, stage="fhir")
-
-    fhir_bundle = build_fhir_bundle(minimax_extraction=extraction, standardized=standardized)
+    # The bundle build overlaps with the validation checks that don't need
+    # the bundle (ICD-10, dose consistency, drug names)
+    _log(log_buffer, "stage_start", "⏳ Stage 3/4 — Building FHIR R4 bundle…",
+         document_id=doc_id, stage="fhir")
+
+    fhir_bundle, data_checks = await asyncio.gather(
+        asyncio.to_thread(
+            build_fhir_bundle_cached, minimax_extraction=extraction, standardized=standardized,
+        ),
+        asyncio.to_thread(
+            run_data_checks, minimax_extraction=extraction, standardized=standardized,
+        ),
+    )
     resources   = len(fhir_bundle.get("entry", []))
 
-    db.insert_pipeline_result(document_id=doc_id, stage="fhir", output=fhir_bundle)
-    db.write_log(
-        "stage_done",
-        f"✅ Stage 3/4 — FHIR bundle built: {resources} resources "
-        f"(Patient + Condition + {resources-2}× MedicationAdministration)",
-        document_id=doc_id, stage="fhir", level="success",
+    await asyncio.to_thread(
+        db.insert_pipeline_result, document_id=doc_id, stage="fhir", output=fhir_bundle,
     )
+    _log(log_buffer, "stage_done",
+         _LazyFmt("✅ Stage 3/4 — FHIR bundle built: {} resources "
+                  "(Patient + Condition + {}× MedicationAdministration)",
+                  resources, resources - 2),
+         document_id=doc_id, stage="fhir", level="success")
 
     # ── Stage 4: Safety Validation ────────────────────────────────────────────
-    db.write_log("stage_start", "⏳ Stage 4/4 — Running 5 safety checks…",
-                 document_id=doc_id, stage="validation")
+    _log(log_buffer, "stage_start", "⏳ Stage 4/4 — Running 5 safety checks…",
+         document_id=doc_id, stage="validation")
 
-    validation   = run_validation(
-        minimax_extraction=extraction, standardized=standardized, fhir_bundle=fhir_bundle,
-    )
+    bundle_checks = run_bundle_checks(minimax_extraction=extraction, fhir_bundle=fhir_bundle)
+    validation   = summarize_checks(data_checks + bundle_checks)
     passed       = validation["passed_count"]
     total        = validation["total_count"]
 
-    db.insert_pipeline_result(document_id=doc_id, stage="validation", output=validation)
+    await asyncio.to_thread(
+        db.insert_pipeline_result, document_id=doc_id, stage="validation", output=validation,
+    )
 
-    # Persist validator flags
+    # Persist validator flags — collected first, written in one bulk
+    # transaction instead of one INSERT+COMMIT cycle per failing check
+    flag_rows = []
     for check in validation.get("checks", []):
         if not check["passed"]:
             severity  = _classify_check_severity(check["name"])
             flag_type = _check_name_to_type(check["name"])
-            flag_id   = db.insert_safety_flag(
-                document_id=doc_id,
-                flag_type=flag_type,
-                severity=severity,
-                details=check["detail"],
-            )
-            critical_count += 1
-            db.write_log(
-                "flag",
-                f"⚠ {severity} — {check['name']}: {check['detail'][:80]}",
-                document_id=doc_id, stage="validation", level="warn",
+            flag_rows.append({
+                "document_id": doc_id,
+                "flag_type":   flag_type,
+                "severity":    severity,
+                "details":     check["detail"],
+            })
+            _log(log_buffer, "flag",
+                 f"⚠ {severity} — {check['name']}: {check['detail'][:80]}",
+                 document_id=doc_id, stage="validation", level="warn")
+
+    flag_ids = await asyncio.to_thread(db.insert_safety_flags_bulk, flag_rows)
+    critical_count += len(flag_rows)
+
+    # Dispatch only after the commit returned real flag ids
+    for row, flag_id in zip(flag_rows, flag_ids):
+        if row["severity"] in ("HIGH", "CRITICAL"):
+            dispatch_alert(
+                doc_id=doc_id, filename=filename, flag_id=flag_id,
+                flag_type=row["flag_type"], severity=row["severity"],
+                details=row["details"],
             )
-            if severity in ("HIGH", "CRITICAL"):
-                dispatch_alert(
-                    doc_id=doc_id, filename=filename, flag_id=flag_id,
-                    flag_type=flag_type, severity=severity, details=check["detail"],
-                )
 
     result_color = "✅" if passed == total else "⚠"
-    db.write_log(
-        "stage_done",
-        f"{result_color} Stage 4/4 — Validation: {passed}/{total} checks passed",
-        document_id=doc_id, stage="validation",
-        level="success" if passed == total else "warn",
-    )
+    _log(log_buffer, "stage_done",
+         f"{result_color} Stage 4/4 — Validation: {passed}/{total} checks passed",
+         document_id=doc_id, stage="validation",
+         level="success" if passed == total else "warn")
 
     if critical_count:
-        db.increment_critical_flags(doc_id, critical_count)
-        db.update_heartbeat(flags_delta=critical_count)
-        db.write_log(
-            "escalation",
-            f"🚨 Autonomous escalation: {critical_count} critical flag(s) raised for {filename}",
-            document_id=doc_id, level="error",
-        )
+        await asyncio.to_thread(db.increment_critical_flags, doc_id, critical_count)
+        tick_stats["flags"] += critical_count
+        _log(log_buffer, "escalation",
+             f"🚨 Autonomous escalation: {critical_count} critical flag(s) raised for {filename}",
+             document_id=doc_id, level="error")
 
     logger.info(
         "[%s] Pipeline done: %d/%d validation passed | %d critical flags",
@@ -217,21 +353,27 @@ def _run_pipeline(doc_id: str, filename: str, file_path: str):
     )
 
 
+# Frozen check-name lookup tables — built once, immutable, shared by all workers
+_SEVERITY = MappingProxyType({
+    "Dose Consistency":          "HIGH",
+    "PII De-identification":     "HIGH",
+    "Drug Name Standardization": "MEDIUM",
+    "ICD-10 Code Validity":      "MEDIUM",
+    "FHIR R4 Schema":            "LOW",
+})
+
+_FLAG_TYPE = MappingProxyType({
+    "Dose Consistency":          "DOSE_VARIANCE",
+    "Drug Name Standardization": "AMBIGUOUS_NAME",
+    "ICD-10 Code Validity":      "CODING_ERROR",
+    "FHIR R4 Schema":            "SCHEMA_ERROR",
+    "PII De-identification":     "PII_LEAK",
+})
+
+
 def _classify_check_severity(check_name: str) -> str:
-    return {
-        "Dose Consistency":          "HIGH",
-        "PII De-identification":     "HIGH",
-        "Drug Name Standardization": "MEDIUM",
-        "ICD-10 Code Validity":      "MEDIUM",
-        "FHIR R4 Schema":            "LOW",
-    }.get(check_name, "MEDIUM")
+    return _SEVERITY.get(check_name, "MEDIUM")
 
 
 def _check_name_to_type(check_name: str) -> str:
-    return {
-        "Dose Consistency":          "DOSE_VARIANCE",
-        "Drug Name Standardization": "AMBIGUOUS_NAME",
-        "ICD-10 Code Validity":      "CODING_ERROR",
-        "FHIR R4 Schema":            "SCHEMA_ERROR",
-        "PII De-identification":     "PII_LEAK",
-    }.get(check_name, "OTHER")
+    return _FLAG_TYPE.get(check_name, "OTHER")
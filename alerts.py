@@ -14,50 +14,63 @@ Endpoints:
   POST /alerts/resolve/{flag_id} — mark a flag resolved
 """
 
-import json
+import asyncio
 import logging
-import os
-import threading
-from datetime import datetime, timezone
+import time
 
 import httpx
-from fastapi import APIRouter, HTTPException
+import orjson
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import JSONResponse
 
 import database as db
+from config import settings
+from responses import conditional_json
 
 logger = logging.getLogger("biovault.alerts")
 
 router = APIRouter(prefix="/alerts", tags=["alerts"])
 
-WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_URL = settings.webhook_url
+ALERT_WORKERS = settings.alert_workers
 
-# Deduplicate in-flight webhook calls — don't block the agent loop
-_webhook_executor_lock = threading.Lock()
+# Long-lived dispatch machinery, started/stopped from the FastAPI lifespan.
+# One shared AsyncClient (connection keep-alive across a flag burst) drained
+# by a small fixed worker pool — no per-alert threads or TLS handshakes.
+_alert_queue: "asyncio.Queue[dict]" = None
+_alert_client: httpx.AsyncClient = None
+_alert_worker_tasks: list = []
+
+# Circuit breaker shared by the worker pool. When the webhook endpoint is
+# down, consecutive failures trip the breaker for an exponentially growing
+# window (capped at 5 min) — alerts during the outage are dropped after the
+# structured log line instead of each spending the full timeout.
+_BREAKER_MAX_TRIP_S = 300
+_breaker = {"fails": 0, "until": 0.0}
 
 
 # ─── REST Endpoints ────────────────────────────────────────────────────────────
 
 @router.get("")
-async def get_unresolved_alerts():
+async def get_unresolved_alerts(request: Request):
     """Return all unresolved safety flags across all documents."""
-    flags = db.get_unresolved_flags()
-    return {
+    flags = await asyncio.to_thread(db.get_unresolved_flags)
+    return conditional_json(request, {
         "status": "ok",
         "count": len(flags),
         "alerts": flags,
-    }
+    })
 
 
 @router.get("/all")
-async def get_all_alerts():
+async def get_all_alerts(request: Request):
     """Return all flags (resolved and unresolved), newest first, max 50."""
-    flags = db.get_all_flags(limit=50)
-    return {
+    flags = await asyncio.to_thread(db.get_all_flags, limit=50)
+    return conditional_json(request, {
         "status": "ok",
         "count": len(flags),
         "alerts": flags,
-    }
+    })
 
 
 @router.post("/resolve/{flag_id}")
@@ -84,8 +97,14 @@ def dispatch_alert(
 
     Actions:
       1. Log a structured JSON alert line (observable by any log aggregator)
-      2. POST to WEBHOOK_URL if configured (non-blocking background thread)
+      2. POST to WEBHOOK_URL if configured (non-blocking, queued to worker pool)
     """
+    log_enabled = logger.isEnabledFor(logging.WARNING)
+    if not WEBHOOK_URL and not log_enabled:
+        # No webhook and no log handler listening — nothing would consume
+        # the payload, so don't build it
+        return
+
     alert_payload = {
         "event": "BIOVAULT_SAFETY_ALERT",
         "timestamp": _now(),
@@ -100,38 +119,106 @@ def dispatch_alert(
     }
 
     # Action 1: structured log (parseable by Datadog / CloudWatch / any aggregator)
-    logger.warning(
-        "AUTONOMOUS_ALERT %s",
-        json.dumps(alert_payload),
-    )
+    if log_enabled:
+        logger.warning("AUTONOMOUS_ALERT %s", _LazyJSON(alert_payload))
 
     # Action 2: webhook POST (fire-and-forget, non-blocking)
     if WEBHOOK_URL:
-        thread = threading.Thread(
-            target=_post_webhook,
-            args=(alert_payload,),
-            daemon=True,
-        )
-        thread.start()
+        if _alert_queue is not None:
+            _alert_queue.put_nowait(alert_payload)
+        else:
+            logger.warning("Alert workers not started — webhook alert dropped")
+
+
+class _LazyJSON:
+    """Defers JSON encoding until a log handler actually formats the record."""
+
+    __slots__ = ("payload",)
 
+    def __init__(self, payload: dict):
+        self.payload = payload
 
-def _post_webhook(payload: dict) -> None:
-    """POST alert payload to WEBHOOK_URL. Runs in a background thread."""
+    def __str__(self) -> str:
+        return orjson.dumps(self.payload).decode()
+
+
+# ─── Async webhook worker pool (lifespan-managed) ──────────────────────────────
+
+async def start_alert_workers() -> None:
+    """Create the shared webhook client and worker pool. Called at startup."""
+    global _alert_queue, _alert_client, _alert_worker_tasks
+
+    if not WEBHOOK_URL:
+        logger.info("WEBHOOK_URL not set — webhook dispatch disabled")
+        return
+
+    limits = httpx.Limits(max_keepalive_connections=10, keepalive_expiry=60.0)
+    transport = httpx.AsyncHTTPTransport(retries=2)
     try:
-        with httpx.Client(timeout=10.0) as client:
-            response = client.post(
+        _alert_client = httpx.AsyncClient(
+            timeout=10.0, limits=limits, transport=transport, http2=True,
+        )
+    except ImportError:
+        # h2 not installed — HTTP/1.1 keep-alive still avoids per-alert handshakes
+        _alert_client = httpx.AsyncClient(timeout=10.0, limits=limits, transport=transport)
+
+    _alert_queue = asyncio.Queue()
+    _alert_worker_tasks = [
+        asyncio.create_task(_alert_worker(), name=f"alert-worker-{i}")
+        for i in range(ALERT_WORKERS)
+    ]
+    logger.info("Alert dispatch started: %d workers → %s", ALERT_WORKERS, WEBHOOK_URL)
+
+
+async def stop_alert_workers() -> None:
+    """Drain the queue, cancel workers, and close the client. Called at shutdown."""
+    global _alert_queue, _alert_client, _alert_worker_tasks
+
+    if _alert_queue is not None:
+        await _alert_queue.join()
+    for task in _alert_worker_tasks:
+        task.cancel()
+    if _alert_client is not None:
+        await _alert_client.aclose()
+
+    _alert_queue = None
+    _alert_client = None
+    _alert_worker_tasks = []
+
+
+async def _alert_worker() -> None:
+    """Drain queued alert payloads and POST them over the shared client."""
+    while True:
+        payload = await _alert_queue.get()
+        try:
+            if time.monotonic() < _breaker["until"]:
+                logger.warning(
+                    "Webhook breaker open (%d consecutive failures) — alert dropped",
+                    _breaker["fails"],
+                )
+                continue
+            response = await _alert_client.post(
                 WEBHOOK_URL,
-                json=payload,
+                content=orjson.dumps(payload),
                 headers={"Content-Type": "application/json"},
             )
+            _breaker["fails"] = 0
             logger.info(
                 "Webhook posted: url=%s status=%d",
                 WEBHOOK_URL,
                 response.status_code,
             )
-    except Exception as exc:
-        logger.warning("Webhook POST failed (non-fatal): %s", exc)
+        except Exception as exc:
+            _breaker["fails"] += 1
+            _breaker["until"] = time.monotonic() + min(
+                _BREAKER_MAX_TRIP_S, 2 ** _breaker["fails"]
+            )
+            logger.warning("Webhook POST failed (non-fatal): %s", exc)
+        finally:
+            _alert_queue.task_done()
 
 
 def _now() -> str:
-    return datetime.now(timezone.utc).isoformat()
+    # Shares database's cached per-second formatter — one timestamp scheme
+    # across alert payloads and DB rows.
+    return db._now()
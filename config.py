@@ -0,0 +1,64 @@
+"""
+BioVault Agent — Central Configuration
+----------------------------------------
+Every environment-driven knob lives here, read once into a frozen Settings
+singleton. Modules import `settings` instead of scattering os.getenv calls,
+so adding a flag means one field here — and nothing re-reads os.environ on
+a hot path as the codebase grows.
+"""
+
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+@dataclass(frozen=True)
+class Settings:
+    # Agent loop
+    poll_interval: int
+    agent_concurrency: int
+    agent_batch: int
+
+    # Alerts
+    webhook_url: str
+    alert_workers: int
+
+    # Storage
+    db_path: str
+    upload_dir: str
+
+    # LLM providers
+    minimax_api_key: str
+    minimax_base_url: str
+    akash_api_key: str
+    akash_base_url: str
+    akash_model: str
+
+    # Caching
+    llm_cache_ttl_seconds: int
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings(
+        poll_interval=int(os.getenv("POLL_INTERVAL_SECONDS", "30")),
+        agent_concurrency=int(os.getenv("AGENT_CONCURRENCY", "10")),
+        agent_batch=int(os.getenv("AGENT_BATCH", "10")),
+        webhook_url=os.getenv("WEBHOOK_URL", ""),
+        alert_workers=int(os.getenv("ALERT_WORKERS", "4")),
+        db_path=os.getenv("DB_PATH", "/data/biovault.db"),
+        upload_dir=os.getenv("UPLOAD_DIR", "/data/uploads"),
+        minimax_api_key=os.getenv("MINIMAX_API_KEY", ""),
+        minimax_base_url=os.getenv("MINIMAX_BASE_URL", "https://api.minimax.io/v1"),
+        akash_api_key=os.getenv("AKASH_API_KEY", ""),
+        akash_base_url=os.getenv("AKASH_BASE_URL", "https://api.akashml.com/v1"),
+        akash_model=os.getenv("AKASH_MODEL", "MiniMaxAI/MiniMax-M2.5"),
+        llm_cache_ttl_seconds=int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    )
+
+
+settings = get_settings()
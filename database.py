@@ -14,35 +14,125 @@ import json
 import os
 import sqlite3
 import threading
+import time
+from collections import deque
 from contextlib import contextmanager
-from datetime import datetime, timezone
+from datetime import datetime
 from typing import Optional
 
-DB_PATH = os.getenv("DB_PATH", "/data/biovault.db")
+from config import settings
+
+DB_PATH = settings.db_path
 
 _lock = threading.Lock()
 
+# Short-TTL memo for the hot dashboard reads (stats, heartbeat, recent
+# docs, unresolved flags). Every open tab and the SSE loop hit the same
+# queries; with the memo they share one computation per TTL window.
+# Writers bump _data_version so a mutation invalidates immediately.
+_READ_CACHE_TTL_S = 2.0
+_read_cache: dict = {}
+_read_cache_lock = threading.Lock()
+_read_inflight: dict = {}
+_data_version = 0
+
+
+def _bump_data_version() -> None:
+    global _data_version
+    with _read_cache_lock:
+        _data_version += 1
+
+
+def data_version() -> int:
+    """Monotonic counter bumped by every write — lets pollers (the SSE
+    loop) detect 'nothing changed' without touching the database."""
+    return _data_version
+
+
+def _cached_fresh(key: str):
+    """Return the cached value for `key` if still valid, else None."""
+    hit = _read_cache.get(key)
+    if hit and hit[0] == _data_version and time.monotonic() - hit[1] < _READ_CACHE_TTL_S:
+        return hit[2]
+    return None
+
+
+def _cached_read(key: str, producer):
+    """
+    TTL memo with singleflight: on a miss, one caller runs the query
+    while concurrent callers for the same key block on its per-key lock
+    and then reuse the result — a thundering herd of dashboard opens
+    costs one DB pass, not one per request.
+    """
+    with _read_cache_lock:
+        value = _cached_fresh(key)
+        if value is not None:
+            return value
+        flight = _read_inflight.get(key)
+        if flight is None:
+            flight = _read_inflight[key] = threading.Lock()
+    with flight:
+        with _read_cache_lock:
+            value = _cached_fresh(key)
+            if value is not None:
+                return value
+            version = _data_version
+        value = producer()
+        with _read_cache_lock:
+            _read_cache[key] = (version, time.monotonic(), value)
+        return value
+
+
+# In-memory mirror of recent log entries. Pipeline logs are batched to the DB
+# once per document, but land here immediately, so the live activity feed
+# never lags behind processing. Seeded lazily from the DB after a restart.
+_live_log = deque(maxlen=500)
+_live_log_lock = threading.Lock()
+_live_log_seq = 0
+
+
+# One connection per thread, opened lazily and kept for the thread's
+# lifetime — connect + pragma setup happens once, not on every DB call.
+_conn_local = threading.local()
+
+# WAL lets dashboard readers proceed while the agent writes;
+# synchronous=NORMAL moves fsync from per-transaction to WAL checkpoints,
+# which is safe with WAL (power loss can drop the tail, never corrupt).
+_CONN_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA foreign_keys=ON",
+)
+
 
 def _ensure_dir():
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
 
-@contextmanager
-def get_conn():
-    """Thread-safe SQLite connection context manager."""
+def _connect() -> sqlite3.Connection:
     _ensure_dir()
     conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=30)
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA foreign_keys=ON")
+    for pragma in _CONN_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+@contextmanager
+def get_conn():
+    """Context manager yielding this thread's pooled SQLite connection."""
+    conn = getattr(_conn_local, "conn", None)
+    if conn is None:
+        conn = _conn_local.conn = _connect()
     try:
         yield conn
         conn.commit()
     except Exception:
         conn.rollback()
         raise
-    finally:
-        conn.close()
 
 
 def init_db():
@@ -57,7 +147,8 @@ def init_db():
                 uploaded_at         TEXT NOT NULL,
                 processed_at        TEXT,
                 critical_flags_count INTEGER NOT NULL DEFAULT 0,
-                error_message       TEXT
+                error_message       TEXT,
+                thumb               TEXT
             );
 
             CREATE INDEX IF NOT EXISTS idx_documents_status
@@ -96,7 +187,19 @@ def init_db():
                 last_seen                   TEXT NOT NULL,
                 documents_processed_total   INTEGER NOT NULL DEFAULT 0,
                 flags_raised_total          INTEGER NOT NULL DEFAULT 0,
-                started_at                  TEXT NOT NULL
+                started_at                  TEXT NOT NULL,
+                last_seen_epoch             INTEGER,
+                started_at_epoch            INTEGER
+            );
+
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key            TEXT PRIMARY KEY,
+                stage          TEXT NOT NULL,
+                model          TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                payload        TEXT NOT NULL,
+                created_at     TEXT NOT NULL,
+                expires_at     TEXT NOT NULL
             );
 
             CREATE TABLE IF NOT EXISTS agent_log (
@@ -113,32 +216,85 @@ def init_db():
                 ON agent_log(timestamp DESC);
         """)
 
+        # Databases created before the thumbnail feature lack the column
+        try:
+            conn.execute("ALTER TABLE documents ADD COLUMN thumb TEXT")
+        except sqlite3.OperationalError:
+            pass
+
+        # Likewise for the precomputed heartbeat epochs; backfill from the
+        # ISO strings so readers never have to parse timestamps
+        for col in ("last_seen_epoch", "started_at_epoch"):
+            try:
+                conn.execute(f"ALTER TABLE agent_heartbeat ADD COLUMN {col} INTEGER")
+            except sqlite3.OperationalError:
+                pass
+        row = conn.execute("""
+            SELECT last_seen, started_at FROM agent_heartbeat
+            WHERE id = 1 AND (last_seen_epoch IS NULL OR started_at_epoch IS NULL)
+        """).fetchone()
+        if row:
+            conn.execute(
+                "UPDATE agent_heartbeat SET last_seen_epoch = ?, started_at_epoch = ? WHERE id = 1",
+                (_iso_to_epoch(row["last_seen"]), _iso_to_epoch(row["started_at"])),
+            )
+
         # Seed the single heartbeat row if not present
+        now = time.time()
         conn.execute("""
-            INSERT OR IGNORE INTO agent_heartbeat (id, last_seen, started_at)
-            VALUES (1, ?, ?)
-        """, (_now(), _now()))
+            INSERT OR IGNORE INTO agent_heartbeat
+                (id, last_seen, started_at, last_seen_epoch, started_at_epoch)
+            VALUES (1, ?, ?, ?, ?)
+        """, (_now(), _now(), int(now), int(now)))
 
 
 # ─── Document helpers ──────────────────────────────────────────────────────────
 
-def insert_document(doc_id: str, filename: str, file_path: str) -> None:
+def insert_document(doc_id: str, filename: str, file_path: str, thumb: str = None) -> None:
     with get_conn() as conn:
         conn.execute("""
-            INSERT INTO documents (id, filename, file_path, status, uploaded_at)
-            VALUES (?, ?, ?, 'pending', ?)
-        """, (doc_id, filename, file_path, _now()))
-
-
-def get_next_pending() -> Optional[sqlite3.Row]:
-    """Return the oldest pending document, or None."""
+            INSERT INTO documents (id, filename, file_path, status, uploaded_at, thumb)
+            VALUES (?, ?, ?, 'pending', ?, ?)
+        """, (doc_id, filename, file_path, _now(), thumb))
+    _bump_data_version()
+
+
+def claim_pending_batch(limit: int = 10) -> list:
+    """
+    Atomically claim up to `limit` oldest pending documents in one
+    UPDATE ... RETURNING statement, flipping them to 'processing' so
+    concurrent workers never double-claim a row. Falls back to a
+    SELECT + CAS inside one transaction on SQLite < 3.35.
+    """
     with get_conn() as conn:
-        return conn.execute("""
-            SELECT * FROM documents
-            WHERE status = 'pending'
-            ORDER BY uploaded_at ASC
-            LIMIT 1
-        """).fetchone()
+        if sqlite3.sqlite_version_info >= (3, 35, 0):
+            rows = conn.execute("""
+                UPDATE documents SET status = 'processing'
+                WHERE id IN (
+                    SELECT id FROM documents
+                    WHERE status = 'pending'
+                    ORDER BY uploaded_at ASC
+                    LIMIT ?
+                )
+                RETURNING *
+            """, (limit,)).fetchall()
+        else:
+            rows = conn.execute("""
+                SELECT * FROM documents
+                WHERE status = 'pending'
+                ORDER BY uploaded_at ASC
+                LIMIT ?
+            """, (limit,)).fetchall()
+            if rows:
+                conn.executemany(
+                    "UPDATE documents SET status = 'processing' WHERE id = ? AND status = 'pending'",
+                    [(r["id"],) for r in rows],
+                )
+        # RETURNING does not guarantee row order — keep FIFO dispatch
+        claimed = sorted((dict(r) for r in rows), key=lambda r: r["uploaded_at"])
+    if claimed:
+        _bump_data_version()
+    return claimed
 
 
 def set_document_status(doc_id: str, status: str, error: str = None) -> None:
@@ -160,6 +316,7 @@ def set_document_status(doc_id: str, status: str, error: str = None) -> None:
                 "UPDATE documents SET status = ? WHERE id = ?",
                 (status, doc_id)
             )
+    _bump_data_version()
 
 
 def increment_critical_flags(doc_id: str, count: int = 1) -> None:
@@ -169,13 +326,18 @@ def increment_critical_flags(doc_id: str, count: int = 1) -> None:
             SET critical_flags_count = critical_flags_count + ?
             WHERE id = ?
         """, (count, doc_id))
+    _bump_data_version()
 
 
 def get_recent_documents(limit: int = 20) -> list:
+    return _cached_read(f"recent_documents:{limit}", lambda: _get_recent_documents(limit))
+
+
+def _get_recent_documents(limit: int) -> list:
     with get_conn() as conn:
         rows = conn.execute("""
             SELECT id, filename, status, uploaded_at, processed_at,
-                   critical_flags_count, error_message
+                   critical_flags_count, error_message, thumb
             FROM documents
             ORDER BY uploaded_at DESC
             LIMIT ?
@@ -190,7 +352,8 @@ def recover_stalled_documents() -> int:
             UPDATE documents SET status = 'pending'
             WHERE status = 'processing'
         """)
-        return cursor.rowcount
+    _bump_data_version()
+    return cursor.rowcount
 
 
 # ─── Pipeline result helpers ───────────────────────────────────────────────────
@@ -221,7 +384,31 @@ def insert_safety_flag(
             INSERT INTO safety_flags (document_id, flag_type, severity, details, timestamp)
             VALUES (?, ?, ?, ?, ?)
         """, (document_id, flag_type, severity, details, _now()))
-        return cursor.lastrowid
+    _bump_data_version()
+    return cursor.lastrowid
+
+
+def insert_safety_flags_bulk(rows: list) -> list:
+    """
+    Insert many safety flags in one transaction (one fsync instead of N).
+    Each row is a dict with document_id, flag_type, severity, details.
+    Returns the new flag ids in input order.
+    """
+    if not rows:
+        return []
+    flag_ids = []
+    with get_conn() as conn:
+        # Take the write lock up front so the whole batch is one txn/fsync
+        conn.execute("BEGIN IMMEDIATE")
+        ts = _now()
+        for row in rows:
+            cursor = conn.execute("""
+                INSERT INTO safety_flags (document_id, flag_type, severity, details, timestamp)
+                VALUES (?, ?, ?, ?, ?)
+            """, (row["document_id"], row["flag_type"], row["severity"], row["details"], ts))
+            flag_ids.append(cursor.lastrowid)
+    _bump_data_version()
+    return flag_ids
 
 
 def resolve_safety_flag(flag_id: int) -> bool:
@@ -230,10 +417,15 @@ def resolve_safety_flag(flag_id: int) -> bool:
             "UPDATE safety_flags SET resolved = 1 WHERE id = ?",
             (flag_id,)
         )
-        return cursor.rowcount > 0
+    _bump_data_version()
+    return cursor.rowcount > 0
 
 
 def get_unresolved_flags() -> list:
+    return _cached_read("unresolved_flags", _get_unresolved_flags)
+
+
+def _get_unresolved_flags() -> list:
     with get_conn() as conn:
         rows = conn.execute("""
             SELECT sf.*, d.filename
@@ -264,13 +456,19 @@ def update_heartbeat(docs_delta: int = 0, flags_delta: int = 0) -> None:
         conn.execute("""
             UPDATE agent_heartbeat
             SET last_seen                 = ?,
+                last_seen_epoch           = ?,
                 documents_processed_total = documents_processed_total + ?,
                 flags_raised_total        = flags_raised_total + ?
             WHERE id = 1
-        """, (_now(), docs_delta, flags_delta))
+        """, (_now(), int(time.time()), docs_delta, flags_delta))
+    _bump_data_version()
 
 
 def get_heartbeat() -> Optional[dict]:
+    return _cached_read("heartbeat", _get_heartbeat)
+
+
+def _get_heartbeat() -> Optional[dict]:
     with get_conn() as conn:
         row = conn.execute("SELECT * FROM agent_heartbeat WHERE id = 1").fetchone()
         return dict(row) if row else None
@@ -284,11 +482,66 @@ def write_log(
     level: str = "info",
 ) -> None:
     """Write a timestamped agent activity entry. Keeps last 500 rows."""
+    ts = _now()
+    append_live_log({
+        "event": event, "message": message, "document_id": document_id,
+        "stage": stage, "level": level, "timestamp": ts,
+    })
     with get_conn() as conn:
         conn.execute("""
             INSERT INTO agent_log (event, message, document_id, stage, level, timestamp)
             VALUES (?, ?, ?, ?, ?, ?)
-        """, (event, message, document_id, stage, level, _now()))
+        """, (event, str(message), document_id, stage, level, ts))
+        conn.execute("""
+            DELETE FROM agent_log WHERE id NOT IN (
+                SELECT id FROM agent_log ORDER BY id DESC LIMIT 500
+            )
+        """)
+
+
+def append_live_log(entry: dict) -> None:
+    """Append a log entry to the in-memory live feed (no DB write)."""
+    global _live_log_seq
+    ts = entry.get("timestamp") or _now()
+    with _live_log_lock:
+        _live_log_seq += 1
+        _live_log.append({
+            "id": _live_log_seq,
+            "timestamp": ts,
+            # Epoch millis so clients never pay for ISO parsing per row
+            "timestamp_ms": _iso_to_epoch(ts) * 1000,
+            "event": entry["event"],
+            "message": entry["message"],
+            "document_id": entry.get("document_id"),
+            "stage": entry.get("stage"),
+            "level": entry.get("level", "info"),
+        })
+
+
+def latest_log_seq() -> int:
+    """Id of the newest live-feed entry (0 when empty) — cheap to poll."""
+    return _live_log_seq
+
+
+def write_logs_bulk(entries: list) -> None:
+    """
+    Write many agent_log entries in one transaction. Keeps last 500 rows.
+    Each entry is a dict with event, message and optional document_id,
+    stage, level.
+    """
+    if not entries:
+        return
+    ts = _now()
+    with get_conn() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany("""
+            INSERT INTO agent_log (event, message, document_id, stage, level, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [
+            (e["event"], str(e["message"]), e.get("document_id"), e.get("stage"),
+             e.get("level", "info"), e.get("timestamp") or ts)
+            for e in entries
+        ])
         conn.execute("""
             DELETE FROM agent_log WHERE id NOT IN (
                 SELECT id FROM agent_log ORDER BY id DESC LIMIT 500
@@ -296,44 +549,85 @@ def write_log(
         """)
 
 
-def get_recent_log(limit: int = 60) -> list:
+def get_recent_log(limit: int = 60, since: int = None) -> list:
+    """
+    Recent activity entries, oldest first. With `since`, only entries
+    whose monotonic id is greater are returned — the delta a polling
+    client needs instead of the full feed.
+    """
+    with _live_log_lock:
+        if _live_log:
+            # Messages may be deferred formatters — render them only here,
+            # when a reader actually wants the text
+            entries = list(_live_log)
+            if since is not None:
+                entries = [e for e in entries if e["id"] > since]
+            return [
+                {**e, "message": str(e["message"])}
+                for e in entries[-limit:]
+            ]
+        if since is not None:
+            return []
+    # Cold start (e.g. right after a restart): serve the durable copy
     with get_conn() as conn:
         rows = conn.execute("""
             SELECT id, event, message, document_id, stage, level, timestamp
             FROM agent_log ORDER BY id DESC LIMIT ?
         """, (limit,)).fetchall()
-        return [dict(r) for r in reversed(rows)]
+        return [
+            {**dict(r), "timestamp_ms": _iso_to_epoch(r["timestamp"]) * 1000}
+            for r in reversed(rows)
+        ]
 
 
 def get_stats() -> dict:
+    return _cached_read("stats", _get_stats)
+
+
+def _get_stats() -> dict:
     with get_conn() as conn:
-        total = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
-        pending = conn.execute(
-            "SELECT COUNT(*) FROM documents WHERE status = 'pending'"
-        ).fetchone()[0]
-        processing = conn.execute(
-            "SELECT COUNT(*) FROM documents WHERE status = 'processing'"
-        ).fetchone()[0]
-        complete = conn.execute(
-            "SELECT COUNT(*) FROM documents WHERE status = 'complete'"
-        ).fetchone()[0]
-        failed = conn.execute(
-            "SELECT COUNT(*) FROM documents WHERE status = 'failed'"
-        ).fetchone()[0]
+        # One table scan instead of five separate COUNT queries
+        counts = dict(conn.execute(
+            "SELECT status, COUNT(*) FROM documents GROUP BY status"
+        ).fetchall())
         unresolved_flags = conn.execute(
             "SELECT COUNT(*) FROM safety_flags WHERE resolved = 0"
         ).fetchone()[0]
         return {
-            "total": total,
-            "pending": pending,
-            "processing": processing,
-            "complete": complete,
-            "failed": failed,
+            "total": sum(counts.values()),
+            "pending": counts.get("pending", 0),
+            "processing": counts.get("processing", 0),
+            "complete": counts.get("complete", 0),
+            "failed": counts.get("failed", 0),
             "unresolved_flags": unresolved_flags,
         }
 
 
 # ─── Utilities ─────────────────────────────────────────────────────────────────
 
+# The YYYY-MM-DDTHH:MM:SS prefix only changes once a second — cache it so the
+# hot path is a divmod + f-string instead of a datetime allocation + strftime.
+# Kept as a single (second, prefix) tuple so the to_thread workers that call
+# _now() always see a matching pair; one reference assignment is atomic, two
+# separate globals are not.
+_last_ts: tuple = (0, "")
+
+
+def _iso_to_epoch(ts: str) -> int:
+    """Parse a stored ISO-8601 timestamp to epoch seconds (0 on failure)."""
+    try:
+        return int(datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp())
+    except Exception:
+        return 0
+
+
 def _now() -> str:
-    return datetime.now(timezone.utc).isoformat()
+    """UTC ISO-8601 timestamp (same shape as datetime.isoformat())."""
+    global _last_ts
+    ns = time.time_ns()
+    s, rem_ns = divmod(ns, 1_000_000_000)
+    cached_s, prefix = _last_ts
+    if s != cached_s:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(s))
+        _last_ts = (s, prefix)
+    return f"{prefix}.{rem_ns // 1000:06d}+00:00"
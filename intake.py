@@ -4,29 +4,38 @@ BioVault Agent — Document Intake Router
 POST /intake                  — upload a document image/PDF into the processing queue
 GET  /intake/simulate         — inject a batch of test documents for demo purposes
 GET  /intake/queue            — return current queue status
+GET  /intake/thumbs.webp      — sprite sheet of recent-queue thumbnails
 GET  /intake/{doc_id}/image   — serve the original uploaded image
 GET  /intake/{doc_id}/results — return pipeline results for a processed document
 """
 
+import asyncio
+import base64
 import json
 import logging
 import mimetypes
 import os
 import shutil
 import sqlite3
+import re
 import uuid
+from hashlib import blake2b
+from io import BytesIO
 from pathlib import Path
+from typing import Optional
 
-from fastapi import APIRouter, File, HTTPException, UploadFile
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import APIRouter, File, HTTPException, Request, UploadFile
+from fastapi.responses import FileResponse, JSONResponse, Response
 
 import database as db
+from config import settings
+from responses import conditional_json
 
 logger = logging.getLogger("biovault.intake")
 
 router = APIRouter(prefix="/intake", tags=["intake"])
 
-UPLOAD_DIR = os.getenv("UPLOAD_DIR", "/data/uploads")
+UPLOAD_DIR = settings.upload_dir
 DEMO_CHART_PATH = Path(__file__).parent / "pipeline" / "demo_chart.jpeg"
 
 ALLOWED_TYPES = {
@@ -39,10 +48,76 @@ ALLOWED_TYPES = {
 MAX_FILE_BYTES = 20 * 1024 * 1024  # 20 MB
 
 
+THUMB_SIZE = (64, 64)
+
+
 def _ensure_upload_dir():
     os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
+def thumb_sprite_meta(docs: list) -> tuple:
+    """
+    Swap inline thumb data URIs for sprite-sheet coordinates. Returns
+    (rev, docs) where rev is a content hash of the distinct thumbnails
+    and each doc carries thumb_idx — its cell in /intake/thumbs.webp —
+    instead of the base64 blob. Docs sharing a thumbnail (the simulate
+    batch) share a cell, so queue payloads shrink from N blobs to N ints
+    and the browser fetches one long-cached image per queue generation.
+    """
+    rev_h = blake2b(digest_size=6)
+    cells: dict = {}
+    out = []
+    for d in docs:
+        d = dict(d)
+        thumb = d.pop("thumb", None)
+        if thumb:
+            idx = cells.get(thumb)
+            if idx is None:
+                idx = cells[thumb] = len(cells)
+                rev_h.update(thumb.encode())
+            d["thumb_idx"] = idx
+        out.append(d)
+    return (rev_h.hexdigest() if cells else None), out
+
+
+def _build_thumb_sheet(thumbs: list) -> bytes:
+    """Stitch distinct 64-px thumbnails into one horizontal WebP strip."""
+    from PIL import Image
+    sheet = Image.new("RGB", (THUMB_SIZE[0] * len(thumbs), THUMB_SIZE[1]), (17, 17, 27))
+    for i, uri in enumerate(thumbs):
+        raw = base64.b64decode(uri.split(",", 1)[1])
+        with Image.open(BytesIO(raw)) as im:
+            im = im.convert("RGB")
+            x = i * THUMB_SIZE[0] + (THUMB_SIZE[0] - im.width) // 2
+            sheet.paste(im, (x, (THUMB_SIZE[1] - im.height) // 2))
+    buf = BytesIO()
+    sheet.save(buf, "WEBP", quality=70)
+    return buf.getvalue()
+
+
+# Built sheets keyed by rev; two generations cover clients mid-refresh
+_thumb_sheets: dict = {}
+_THUMB_SHEETS_KEEP = 2
+
+
+def _make_thumb(file_path: str) -> Optional[str]:
+    """
+    Build a small inline thumbnail for the dashboard document list as a
+    base64 WebP data URI. Generated once at intake so list renders never
+    trigger per-document image requests. Returns None for files PIL
+    can't rasterize (e.g. PDFs); the client falls back to a placeholder.
+    """
+    try:
+        from PIL import Image
+        with Image.open(file_path) as im:
+            im.thumbnail(THUMB_SIZE)
+            buf = BytesIO()
+            im.convert("RGB").save(buf, "WEBP", quality=70)
+        return "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode()
+    except Exception:
+        return None
+
+
 @router.post("")
 async def intake_document(file: UploadFile = File(...)):
     """
@@ -67,10 +142,14 @@ async def intake_document(file: UploadFile = File(...)):
     suffix = Path(original_name).suffix or ".jpg"
     dest_path = os.path.join(UPLOAD_DIR, f"{doc_id}{suffix}")
 
-    with open(dest_path, "wb") as f:
-        f.write(contents)
+    # Disk write for a 20 MB upload is long enough to stall the loop
+    await asyncio.to_thread(Path(dest_path).write_bytes, contents)
 
-    db.insert_document(doc_id=doc_id, filename=original_name, file_path=dest_path)
+    thumb = await asyncio.to_thread(_make_thumb, dest_path)
+    await asyncio.to_thread(
+        db.insert_document,
+        doc_id=doc_id, filename=original_name, file_path=dest_path, thumb=thumb,
+    )
 
     logger.info("Document queued: id=%s filename=%s size=%d", doc_id, original_name, len(contents))
 
@@ -95,15 +174,22 @@ async def simulate_batch():
 
     queued = []
 
+    # All five docs are copies of the same chart — one thumbnail serves all
+    demo_thumb = None
+    if DEMO_CHART_PATH.exists():
+        demo_thumb = await asyncio.to_thread(_make_thumb, str(DEMO_CHART_PATH))
+
     # Document 1: The real Delta Hospital chemo chart
     if DEMO_CHART_PATH.exists():
         doc_id = str(uuid.uuid4())
         dest = os.path.join(UPLOAD_DIR, f"{doc_id}.jpeg")
-        shutil.copy2(str(DEMO_CHART_PATH), dest)
-        db.insert_document(
+        await asyncio.to_thread(shutil.copy2, str(DEMO_CHART_PATH), dest)
+        await asyncio.to_thread(
+            db.insert_document,
             doc_id=doc_id,
             filename="delta_hospital_chemo_chart.jpeg",
             file_path=dest,
+            thumb=demo_thumb,
         )
         queued.append({
             "document_id": doc_id,
@@ -120,11 +206,13 @@ async def simulate_batch():
         if DEMO_CHART_PATH.exists():
             doc_id = str(uuid.uuid4())
             dest = os.path.join(UPLOAD_DIR, f"{doc_id}.jpeg")
-            shutil.copy2(str(DEMO_CHART_PATH), dest)
-            db.insert_document(
+            await asyncio.to_thread(shutil.copy2, str(DEMO_CHART_PATH), dest)
+            await asyncio.to_thread(
+                db.insert_document,
                 doc_id=doc_id,
                 filename=f"synthetic_chart_{i:02d}.jpeg",
                 file_path=dest,
+                thumb=demo_thumb,
             )
             queued.append({
                 "document_id": doc_id,
@@ -144,23 +232,81 @@ async def simulate_batch():
 
 
 @router.get("/queue")
-async def queue_status():
+async def queue_status(request: Request):
     """Return a summary of the current document queue."""
-    stats = db.get_stats()
-    recent = db.get_recent_documents(limit=20)
-    return {
+    stats, recent = await asyncio.gather(
+        asyncio.to_thread(db.get_stats),
+        asyncio.to_thread(db.get_recent_documents, limit=20),
+    )
+    thumb_rev, recent = thumb_sprite_meta(recent)
+    return conditional_json(request, {
         "stats": stats,
         "recent_documents": recent,
-    }
+        "thumb_rev": thumb_rev,
+    })
+
+
+@router.get("/thumbs.webp", include_in_schema=False)
+async def thumb_sheet(rev: str = None):
+    """
+    Sprite sheet of the recent-queue thumbnails. One cell per distinct
+    thumbnail, addressed by the thumb_idx values in the queue payload.
+    The rev query parameter names the generation the client was told
+    about: a sheet we still hold for that rev is served immutable; any
+    other rev falls back to the current sheet with no-cache, so a URL
+    from a just-changed queue is never poisoned in the browser cache.
+    """
+    cached = _thumb_sheets.get(rev) if rev else None
+    if cached is not None:
+        return Response(
+            content=cached,
+            media_type="image/webp",
+            headers={
+                "Cache-Control": "public, max-age=3600, immutable",
+                "ETag": f'"{rev}"',
+            },
+        )
+
+    docs = await asyncio.to_thread(db.get_recent_documents, limit=20)
+    thumbs = list(dict.fromkeys(d["thumb"] for d in docs if d.get("thumb")))
+    if not thumbs:
+        raise HTTPException(status_code=404, detail="No thumbnails available")
+
+    rev_h = blake2b(digest_size=6)
+    for uri in thumbs:
+        rev_h.update(uri.encode())
+    current_rev = rev_h.hexdigest()
+
+    sheet = _thumb_sheets.get(current_rev)
+    if sheet is None:
+        sheet = await asyncio.to_thread(_build_thumb_sheet, thumbs)
+        _thumb_sheets[current_rev] = sheet
+        while len(_thumb_sheets) > _THUMB_SHEETS_KEEP:
+            _thumb_sheets.pop(next(iter(_thumb_sheets)))
+
+    immutable = rev is None or rev == current_rev
+    return Response(
+        content=sheet,
+        media_type="image/webp",
+        headers={
+            "Cache-Control": (
+                "public, max-age=3600, immutable" if immutable else "no-cache"
+            ),
+            "ETag": f'"{current_rev}"',
+        },
+    )
 
 
 @router.get("/{doc_id}/image")
 async def get_document_image(doc_id: str):
     """Serve the original uploaded image for a document."""
-    with db.get_conn() as conn:
-        row = conn.execute(
-            "SELECT file_path, filename FROM documents WHERE id = ?", (doc_id,)
-        ).fetchone()
+    def _fetch():
+        with db.get_conn() as conn:
+            return conn.execute(
+                "SELECT file_path, filename FROM documents WHERE id = ?", (doc_id,)
+            ).fetchone()
+
+    row = await asyncio.to_thread(_fetch)
 
     if not row:
         raise HTTPException(status_code=404, detail="Document not found")
@@ -179,30 +325,71 @@ async def get_document_image(doc_id: str):
     )
 
 
+# FHIR bundles are highlighted once server-side (same token classes the
+# dashboard stylesheet defines) so N open tabs don't each re-highlight
+# the same immutable bundle. Keyed by doc generation, capped small.
+_JSON_TOK = re.compile(
+    r'("(?:[^"\\]|\\.)*")(\s*:)?|(-?\d+\.?\d*(?:[eE][+-]?\d+)?)|\b(true|false|null)\b'
+)
+_ICD_RE = re.compile(r"^[A-Z]\d{2}")
+_fhir_html_cache: dict = {}
+_FHIR_HTML_KEEP = 50
+
+
+def _hl_token(m: "re.Match") -> str:
+    string, colon, number, literal = m.groups()
+    if string:
+        value = string[1:-1]
+        if colon:
+            return f'"<span class="jk">{value}</span>"{colon}'
+        cls = "jicd" if _ICD_RE.match(value) else "js"
+        return f'"<span class="{cls}">{value}</span>"'
+    if number:
+        return f'<span class="jn">{number}</span>'
+    cls = "jnull" if literal == "null" else "jb"
+    return f'<span class="{cls}">{literal}</span>'
+
+
+def _fhir_bundle_html(doc_id: str, processed_at: str, bundle: dict) -> str:
+    key = f"{doc_id}:{processed_at or ''}"
+    html = _fhir_html_cache.get(key)
+    if html is None:
+        text = json.dumps(bundle, indent=2)
+        text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        html = _JSON_TOK.sub(_hl_token, text)
+        _fhir_html_cache[key] = html
+        while len(_fhir_html_cache) > _FHIR_HTML_KEEP:
+            _fhir_html_cache.pop(next(iter(_fhir_html_cache)))
+    return html
+
+
 @router.get("/{doc_id}/results")
-async def get_document_results(doc_id: str):
+async def get_document_results(request: Request, doc_id: str):
     """Return all pipeline results and safety flags for a processed document."""
-    with db.get_conn() as conn:
-        doc_row = conn.execute(
-            "SELECT * FROM documents WHERE id = ?", (doc_id,)
-        ).fetchone()
-
-        if not doc_row:
-            raise HTTPException(status_code=404, detail="Document not found")
-
-        stage_rows = conn.execute(
-            """SELECT stage, output_json, confidence, timestamp
-               FROM pipeline_results WHERE document_id = ?
-               ORDER BY id ASC""",
-            (doc_id,),
-        ).fetchall()
-
-        flag_rows = conn.execute(
-            """SELECT id, flag_type, severity, details, resolved, timestamp
-               FROM safety_flags WHERE document_id = ?
-               ORDER BY id ASC""",
-            (doc_id,),
-        ).fetchall()
+    def _fetch():
+        with db.get_conn() as conn:
+            doc = conn.execute(
+                "SELECT * FROM documents WHERE id = ?", (doc_id,)
+            ).fetchone()
+            if not doc:
+                return None, None, None
+            stages = conn.execute(
+                """SELECT stage, output_json, confidence, timestamp
+                   FROM pipeline_results WHERE document_id = ?
+                   ORDER BY id ASC""",
+                (doc_id,),
+            ).fetchall()
+            flags = conn.execute(
+                """SELECT id, flag_type, severity, details, resolved, timestamp
+                   FROM safety_flags WHERE document_id = ?
+                   ORDER BY id ASC""",
+                (doc_id,),
+            ).fetchall()
+            return doc, stages, flags
+
+    doc_row, stage_rows, flag_rows = await asyncio.to_thread(_fetch)
+    if not doc_row:
+        raise HTTPException(status_code=404, detail="Document not found")
 
     stages = {}
     for r in stage_rows:
@@ -218,7 +405,7 @@ async def get_document_results(doc_id: str):
     validation = stages.get("validation", {})
     fhir = stages.get("fhir", {})
 
-    return {
+    return conditional_json(request, {
         "document": dict(doc_row),
         "extraction_summary": {
             "hospital": extraction.get("hospital", {}),
@@ -240,5 +427,8 @@ async def get_document_results(doc_id: str):
         },
         "validation": validation,
         "fhir_bundle": fhir,
+        "fhir_bundle_html": (
+            _fhir_bundle_html(doc_id, doc_row["processed_at"], fhir) if fhir else None
+        ),
         "safety_flags": flags,
-    }
+    })
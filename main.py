@@ -1,8 +1,8 @@
 """
 BioVault Agent — FastAPI Application Entry Point
 --------------------------------------------------
-Starts the autonomous agent loop as a daemon thread inside the FastAPI lifespan.
-Single container: one uvicorn process, one agent thread.
+Starts the autonomous agent loop as an asyncio task inside the FastAPI lifespan.
+Single container: one uvicorn process, one event loop.
 
 Endpoints mounted:
   GET  /health              — agent liveness + heartbeat + uptime
@@ -15,19 +15,17 @@ Endpoints mounted:
   POST /alerts/resolve/{id} — resolve a flag
 """
 
+import asyncio
 import logging
-import os
-import threading
 import time
 from contextlib import asynccontextmanager
-from datetime import datetime, timezone
 
-from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
-load_dotenv()
+from config import settings
+from responses import conditional_json
 
 logging.basicConfig(
     level=logging.INFO,
@@ -42,37 +40,47 @@ _start_time = time.time()
 async def lifespan(app: FastAPI):
     """
     Application lifespan:
-      startup  — init DB, recover stalled docs, start agent daemon thread
+      startup  — init DB, recover stalled docs, start agent loop task
       shutdown — signal the agent loop to stop
     """
+    import asyncio
+    import contextlib
+
     import database as db
     from agent import run_agent_loop, _stop_event
+    from alerts import start_alert_workers, stop_alert_workers
     from pipeline.datadog_tracer import init_tracer
 
     logger.info("BioVault Agent starting up")
 
     # Initialize SQLite schema (idempotent)
     db.init_db()
-    logger.info("Database initialized: %s", os.getenv("DB_PATH", "/data/biovault.db"))
+    logger.info("Database initialized: %s", settings.db_path)
 
     # Initialize Datadog tracing (degrades gracefully if not configured)
     init_tracer()
 
-    # Start the autonomous agent loop as a daemon thread
-    agent_thread = threading.Thread(
-        target=run_agent_loop,
-        name="biovault-agent-loop",
-        daemon=True,
-    )
-    agent_thread.start()
-    logger.info("Agent daemon thread started: %s", agent_thread.name)
+    # Start the webhook alert worker pool (no-op if WEBHOOK_URL unset)
+    await start_alert_workers()
 
-    yield
+    # Start the autonomous agent loop on the event loop
+    agent_task = asyncio.create_task(run_agent_loop(), name="biovault-agent-loop")
+    logger.info("Agent loop task started")
 
-    # Signal the agent to stop on shutdown (it will finish its current tick)
-    _stop_event.set()
-    agent_thread.join(timeout=10)
-    logger.info("BioVault Agent shut down cleanly")
+    try:
+        yield
+    finally:
+        # Signal the agent to stop (it finishes its current tick), then cancel
+        # anything still in flight rather than killing the process under it
+        _stop_event.set()
+        try:
+            await asyncio.wait_for(agent_task, timeout=10)
+        except asyncio.TimeoutError:
+            agent_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await agent_task
+        await stop_alert_workers()
+        logger.info("BioVault Agent shut down cleanly")
 
 
 app = FastAPI(
@@ -110,7 +118,7 @@ app.include_router(dashboard_router)
 # ─── Health endpoint ───────────────────────────────────────────────────────────
 
 @app.get("/health", tags=["meta"])
-async def health():
+async def health(request: Request):
     """
     Agent liveness check.
     Returns agent status, last heartbeat timestamp, and uptime in seconds.
@@ -118,22 +126,22 @@ async def health():
     """
     import database as db
 
-    heartbeat = db.get_heartbeat()
-    stats = db.get_stats()
+    # DB reads run in worker threads so the handler never blocks the event
+    # loop (which also drives the agent and every open SSE stream)
+    heartbeat, stats = await asyncio.gather(
+        asyncio.to_thread(db.get_heartbeat),
+        asyncio.to_thread(db.get_stats),
+    )
     uptime_seconds = int(time.time() - _start_time)
 
+    # Freshness from the precomputed epoch column — no ISO parsing per request
     last_seen = heartbeat["last_seen"] if heartbeat else None
+    last_seen_epoch = heartbeat.get("last_seen_epoch") if heartbeat else None
     agent_status = "running"
-    if last_seen:
-        try:
-            dt = datetime.fromisoformat(last_seen.replace("Z", "+00:00"))
-            age = (datetime.now(timezone.utc) - dt).total_seconds()
-            if age > 90:
-                agent_status = "stalled"
-        except Exception:
-            pass
-
-    return {
+    if last_seen_epoch and time.time() - last_seen_epoch > 90:
+        agent_status = "stalled"
+
+    return conditional_json(request, {
         "status": agent_status,
         "heartbeat": last_seen,
         "uptime_seconds": uptime_seconds,
@@ -143,7 +151,18 @@ async def health():
         "queue": stats,
         "service": "biovault-agent",
         "version": "2.0.0",
-    }
+    })
+
+
+# Fire-and-forget tick tasks need a strong reference until done, or the
+# event loop may garbage-collect them mid-flight (create_task pitfall)
+_tick_tasks: set = set()
+
+
+def _tick_done(task):
+    _tick_tasks.discard(task)
+    if not task.cancelled() and task.exception():
+        logger.error("Triggered agent tick failed: %s", task.exception())
 
 
 @app.post("/agent/process-now", tags=["meta"])
@@ -153,27 +172,43 @@ async def process_now():
     Useful for demos and post-upload UX. The agent is still autonomous;
     this just wakes it up early.
     """
-    import threading
     from agent import _tick
-    t = threading.Thread(target=_tick, daemon=True)
-    t.start()
+    task = asyncio.create_task(_tick())
+    _tick_tasks.add(task)
+    task.add_done_callback(_tick_done)
     return {"status": "ok", "message": "Agent tick triggered — check /agent/activity for progress"}
 
 
 @app.get("/agent/activity", tags=["meta"])
-async def agent_activity(limit: int = 60):
+async def agent_activity(request: Request, limit: int = 60, since: int = None, wait: float = 0):
     """
     Return recent agent log entries for the live activity feed.
-    The dashboard polls this every 3 seconds when any document is processing.
+    Polled by the dashboard's fallback path when the SSE stream is down.
+
+    With `since=<id>` only newer entries come back (a delta, flagged in
+    the response), and `wait=<s>` turns the request into a long poll that
+    holds the connection (max 25s) until something new is logged.
     """
     import database as db
-    entries = db.get_recent_log(limit=limit)
-    stats   = db.get_stats()
-    return {
+    # A cursor past the current head is from a previous boot of the
+    # in-memory sequence — fall back to the full feed instead of a
+    # long-poll that can never be satisfied
+    if since is not None and since > db.latest_log_seq():
+        since = None
+    if since is not None and wait > 0:
+        deadline = time.monotonic() + min(wait, 25.0)
+        while db.latest_log_seq() <= since and time.monotonic() < deadline:
+            await asyncio.sleep(0.5)
+    entries, stats = await asyncio.gather(
+        asyncio.to_thread(db.get_recent_log, limit=limit, since=since),
+        asyncio.to_thread(db.get_stats),
+    )
+    return conditional_json(request, {
         "entries": entries,
+        "delta": since is not None,
         "has_active": stats["processing"] > 0,
         "queue_stats": stats,
-    }
+    })
 
 
 @app.get("/", tags=["meta"])
@@ -20,20 +20,22 @@ zero changes.
 
 import json
 import logging
-import os
 import re
 import time
 
 import httpx
-from dotenv import load_dotenv
 
-load_dotenv()
+from config import settings
 
 logger = logging.getLogger("biovault.akash_agent")
 
-AKASH_API_KEY = os.getenv("AKASH_API_KEY", "")
-AKASH_BASE_URL = os.getenv("AKASH_BASE_URL", "https://api.akashml.com/v1")
-AKASH_MODEL = os.getenv("AKASH_MODEL", "MiniMaxAI/MiniMax-M2.5")
+AKASH_API_KEY = settings.akash_api_key
+AKASH_BASE_URL = settings.akash_base_url
+AKASH_MODEL = settings.akash_model
+
+# Bump whenever the standardization prompts change — folded into llm_cache
+# keys so stale cached outputs are invalidated automatically.
+PROMPT_VERSION = "v1"
 
 STANDARDIZATION_SYSTEM = (
     "You are a clinical pharmacist and medical coder specializing in oncology. "
@@ -15,12 +15,88 @@ Resources included:
   - MedicationAdministration × N (one per drug per cycle)
 """
 
+import copy
+import threading
 import uuid
+from collections import OrderedDict
 from datetime import datetime
+from hashlib import blake2b
 from typing import Optional
 
+import orjson
+
 from pipeline.validator import hash_patient_id
 
+# Bounded LRU of built bundles keyed on a digest of both inputs — repeat
+# content (demo batches, reprocessed documents) skips the template walk.
+_BUNDLE_CACHE_MAX = 256
+_bundle_cache: "OrderedDict[bytes, dict]" = OrderedDict()
+_bundle_cache_lock = threading.Lock()
+
+
+def build_fhir_bundle_cached(minimax_extraction: dict, standardized: dict) -> dict:
+    """
+    Memoized build_fhir_bundle. Keyed on blake2b of extraction +
+    standardization (both feed the bundle: PII hash from the former,
+    ICD-10/drugs from the latter). Thread-safe for the worker pool.
+
+    The cache memoizes the content only. Every call returns a private
+    copy re-stamped with fresh Bundle/Condition/MedicationAdministration
+    ids and a current timestamp — identical charts (the demo batch) must
+    not share resource identity or a frozen build time, and callers must
+    never see the cached dict itself.
+    """
+    key = blake2b(
+        orjson.dumps((minimax_extraction, standardized), option=orjson.OPT_SORT_KEYS),
+        digest_size=16,
+    ).digest()
+
+    with _bundle_cache_lock:
+        cached = _bundle_cache.get(key)
+        if cached is not None:
+            _bundle_cache.move_to_end(key)
+
+    if cached is None:
+        cached = build_fhir_bundle(
+            minimax_extraction=minimax_extraction, standardized=standardized,
+        )
+        with _bundle_cache_lock:
+            _bundle_cache[key] = cached
+            if len(_bundle_cache) > _BUNDLE_CACHE_MAX:
+                _bundle_cache.popitem(last=False)
+
+    return _refresh_identity(cached)
+
+
+def _refresh_identity(bundle: dict) -> dict:
+    """
+    Deep-copy a built bundle and renew everything that must be unique
+    per document: the Bundle id and timestamps, Condition and
+    MedicationAdministration ids, and the references tying them
+    together. The de-identified Patient id is a content hash and stays.
+    """
+    bundle = copy.deepcopy(bundle)
+    now = datetime.utcnow()
+    stamp = now.isoformat() + "Z"
+    bundle["id"] = str(uuid.uuid4())
+    bundle["timestamp"] = stamp
+    bundle["meta"]["lastUpdated"] = stamp
+    condition_id = "condition-" + str(uuid.uuid4())[:8]
+    for entry in bundle.get("entry", []):
+        resource = entry.get("resource", {})
+        rtype = resource.get("resourceType")
+        if rtype == "Condition":
+            resource["id"] = condition_id
+            resource["recordedDate"] = now.strftime("%Y-%m-%d")
+            entry["fullUrl"] = f"urn:uuid:{condition_id}"
+        elif rtype == "MedicationAdministration":
+            med_id = "medadmin-" + str(uuid.uuid4())[:8]
+            resource["id"] = med_id
+            entry["fullUrl"] = f"urn:uuid:{med_id}"
+            if "context" in resource:
+                resource["context"]["reference"] = f"Condition/{condition_id}"
+    return bundle
+
 
 def build_fhir_bundle(
     minimax_extraction: dict,
@@ -0,0 +1,78 @@
+"""
+LLM Response Cache
+-------------------
+Content-addressed cache for the two expensive pipeline LLM calls.
+
+Stage 1 (MiniMax vision) is keyed on the SHA-256 of the uploaded file bytes;
+Stage 2 (AkashML standardization) on the SHA-256 of its canonicalized input
+JSON. Each agent module exports a PROMPT_VERSION constant that is folded into
+the key, so editing a prompt automatically invalidates old entries.
+
+A cache hit turns a multi-second LLM round-trip (plus token cost) into a
+single hash + SQLite fetch.
+"""
+
+import hashlib
+import json
+import logging
+
+import database as db
+from config import settings
+
+logger = logging.getLogger("biovault.llm_cache")
+
+DEFAULT_TTL_SECONDS = settings.llm_cache_ttl_seconds
+
+
+def make_key(stage: str, prompt_version: str, content_hash: str) -> str:
+    """Build the canonical cache key: <stage>:<prompt_version>:<sha256>."""
+    return f"{stage}:{prompt_version}:{content_hash}"
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_json(obj: dict) -> str:
+    """Stable hash of a JSON-serializable dict (key order independent)."""
+    return hashlib.sha256(
+        json.dumps(obj, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+def get(key: str):
+    """Return the cached payload dict for `key`, or None on miss/expiry."""
+    with db.get_conn() as conn:
+        row = conn.execute(
+            "SELECT payload FROM llm_cache WHERE key = ? AND expires_at > ?",
+            (key, db._now()),
+        ).fetchone()
+    if row is None:
+        return None
+    try:
+        return json.loads(row["payload"])
+    except (json.JSONDecodeError, TypeError):
+        logger.warning("Corrupt cache payload for key=%s — treating as miss", key)
+        return None
+
+
+def set(
+    key: str,
+    value: dict,
+    ttl: int = DEFAULT_TTL_SECONDS,
+    stage: str = "",
+    model: str = "",
+    prompt_version: str = "",
+) -> None:
+    """Store `value` (JSON-serializable) under `key` with a TTL in seconds."""
+    from datetime import datetime, timedelta, timezone
+
+    now = datetime.now(timezone.utc)
+    expires_at = (now + timedelta(seconds=ttl)).isoformat()
+    with db.get_conn() as conn:
+        conn.execute("""
+            INSERT OR REPLACE INTO llm_cache
+                (key, stage, model, prompt_version, payload, created_at, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (key, stage, model, prompt_version, json.dumps(value),
+              now.isoformat(), expires_at))
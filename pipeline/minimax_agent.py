@@ -12,19 +12,21 @@ NOTE: The OpenAI-compatible endpoint does NOT support images.
 
 import base64
 import json
-import os
 import time
 from pathlib import Path
 
 import httpx
-from dotenv import load_dotenv
 
-load_dotenv()
+from config import settings
 
-MINIMAX_API_KEY = os.getenv("MINIMAX_API_KEY", "")
-MINIMAX_BASE_URL = os.getenv("MINIMAX_BASE_URL", "https://api.minimax.io/v1")
+MINIMAX_API_KEY = settings.minimax_api_key
+MINIMAX_BASE_URL = settings.minimax_base_url
 MINIMAX_MODEL = "MiniMax-Text-01"
 
+# Bump whenever the extraction prompts change — folded into llm_cache keys
+# so stale cached extractions are invalidated automatically.
+PROMPT_VERSION = "v1"
+
 EXTRACTION_SYSTEM_PROMPT = """You are a clinical document digitization specialist.
 Your task is to extract ALL information from handwritten chemotherapy charts with
 extreme precision. Patient safety depends on accuracy — a misread dose can be fatal.
@@ -109,13 +111,17 @@ def get_image_mime_type(image_path: str) -> str:
     return mime_map.get(suffix, "image/jpeg")
 
 
-def extract_from_image(image_path: str, tracer=None) -> dict:
+def extract_from_image(image_path: str, tracer=None, image_bytes: bytes = None) -> dict:
     """
     Send image to MiniMax vision model and extract structured clinical data.
 
     Args:
-        image_path: Path to the chemotherapy chart image
+        image_path: Path to the chemotherapy chart image (always used for the
+            MIME type; read from disk only when image_bytes is not given)
         tracer: Optional Datadog tracer wrapper
+        image_bytes: Optional pre-loaded file contents — lets callers that
+            already read the file (e.g. for cache hashing) skip a second
+            disk read
 
     Returns:
         dict with extraction results and metadata
@@ -125,7 +131,10 @@ def extract_from_image(image_path: str, tracer=None) -> dict:
     if not MINIMAX_API_KEY or MINIMAX_API_KEY == "your_minimax_api_key_here":
         raise ValueError("MINIMAX_API_KEY not set in .env")
 
-    b64_image = encode_image_to_base64(image_path)
+    if image_bytes is None:
+        b64_image = encode_image_to_base64(image_path)
+    else:
+        b64_image = base64.b64encode(image_bytes).decode("utf-8")
     mime_type = get_image_mime_type(image_path)
     data_url = f"data:{mime_type};base64,{b64_image}"
 
@@ -16,13 +16,15 @@ import hashlib
 import re
 from typing import Any, Optional
 
-KNOWN_MISSPELLINGS = {
+# Loaded once at import, frozen — every check is a single O(1) set probe
+# with no per-document table I/O.
+KNOWN_MISSPELLINGS = frozenset({
     "cytosare", "cytbrar", "cytbror", "cytarabinr", "cytosar-u",
     "dauno", "daunorubicn", "daunorobicin", "daunoribicin",
     "daunorubicine",
-}
+})
 
-STANDARD_DRUG_NAMES = {
+STANDARD_DRUG_NAMES = frozenset({
     "daunorubicin",
     "cytarabine",
     "idarubicin",
@@ -34,7 +36,7 @@ STANDARD_DRUG_NAMES = {
     "decitabine",
     "gemtuzumab",
     "venetoclax",
-}
+})
 
 ICD10_PATTERN = re.compile(r"^[A-Z][0-9]{2}(\.[0-9A-Z]{1,4})?$")
 
@@ -457,6 +459,54 @@ def _check_drug_standardization(standardized: dict) -> dict:
     }
 
 
+# Canonical display order of the 5 checks in validation reports
+_CHECK_ORDER = [
+    "PII De-identification",
+    "ICD-10 Code Validity",
+    "Dose Consistency",
+    "FHIR R4 Schema",
+    "Drug Name Standardization",
+]
+
+
+def run_data_checks(minimax_extraction: dict, standardized: dict) -> list:
+    """
+    Run the checks that depend only on extraction + standardization output
+    (ICD-10, dose consistency, drug names). These can run concurrently with
+    the FHIR bundle build since neither side needs the other.
+    """
+    return [
+        _check_icd10(standardized),
+        _check_dose_consistency(minimax_extraction, standardized),
+        _check_drug_standardization(standardized),
+    ]
+
+
+def run_bundle_checks(minimax_extraction: dict, fhir_bundle: dict) -> list:
+    """Run the checks that need the built FHIR bundle (PII, FHIR schema)."""
+    return [
+        _check_pii(minimax_extraction, fhir_bundle),
+        _check_fhir_schema(fhir_bundle),
+    ]
+
+
+def summarize_checks(checks: list) -> dict:
+    """Assemble individual check results into the structured validation report."""
+    order = {name: i for i, name in enumerate(_CHECK_ORDER)}
+    checks = sorted(checks, key=lambda c: order.get(c["name"], len(order)))
+
+    passed_count = sum(1 for c in checks if c["passed"])
+    total_count = len(checks)
+    overall_passed = passed_count == total_count
+
+    return {
+        "checks": checks,
+        "overall_passed": overall_passed,
+        "passed_count": passed_count,
+        "total_count": total_count,
+    }
+
+
 def run_validation(
     minimax_extraction: dict,
     standardized: dict,
@@ -478,24 +528,10 @@ def run_validation(
             "total_count": int,
         }
     """
-    checks = [
-        _check_pii(minimax_extraction, fhir_bundle),
-        _check_icd10(standardized),
-        _check_dose_consistency(minimax_extraction, standardized),
-        _check_fhir_schema(fhir_bundle),
-        _check_drug_standardization(standardized),
-    ]
-
-    passed_count = sum(1 for c in checks if c["passed"])
-    total_count = len(checks)
-    overall_passed = passed_count == total_count
-
-    return {
-        "checks": checks,
-        "overall_passed": overall_passed,
-        "passed_count": passed_count,
-        "total_count": total_count,
-    }
+    return summarize_checks(
+        run_data_checks(minimax_extraction, standardized)
+        + run_bundle_checks(minimax_extraction, fhir_bundle)
+    )
 
 
 def hash_patient_id(name: str, reg_number: str) -> str:
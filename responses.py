@@ -0,0 +1,23 @@
+"""
+BioVault Agent — Conditional JSON Responses
+---------------------------------------------
+Helper giving the polled JSON endpoints ETag / If-None-Match support:
+when the payload hasn't changed since the client's last poll, the reply
+is an empty 304 instead of the full body — no re-transfer, no JSON
+parse, no re-render on the browser side.
+"""
+
+from hashlib import blake2b
+
+import orjson
+from fastapi import Request, Response
+
+
+def conditional_json(request: Request, payload) -> Response:
+    """Serialize `payload` with an ETag, returning 304 on an If-None-Match hit."""
+    body = orjson.dumps(payload)
+    etag = '"' + blake2b(body, digest_size=8).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,969 @@
+let _selectedDocId = null;
+let _fhirData      = null;
+let _docs          = [];
+let _thumbRev      = null;
+let _startedAt     = null;
+let _activeTab     = 'overview';
+
+// ── DOM helpers ──────────────────────────────────────────────────────────────
+// Node lookups are cached (the ids are static) and all poll-driven DOM
+// writes are batched into one requestAnimationFrame so each update cycle
+// costs a single layout/paint instead of one per mutated element.
+const _nodes = {};
+function $id(id) {
+  let el = _nodes[id];
+  if (!el || !el.isConnected) el = _nodes[id] = document.getElementById(id);
+  return el;
+}
+
+let _raf = null;
+const _pendingWrites = [];
+function scheduleUpdate(fn) {
+  _pendingWrites.push(fn);
+  if (_raf) return;
+  _raf = requestAnimationFrame(() => {
+    _raf = null;
+    const fns = _pendingWrites.splice(0);
+    fns.forEach(f => f());
+  });
+}
+
+// ── Sidebar resize ────────────────────────────────────────────────────────────
+(function() {
+  const handle  = document.getElementById('resize-handle');
+  const sidebar = document.querySelector('.sidebar');
+  const MIN_W = 200, MAX_W = 620, KEY = 'bv_sidebar_w';
+  const saved = localStorage.getItem(KEY);
+  if (saved) sidebar.style.width = saved + 'px';
+  let dragging = false, startX = 0, startW = 0;
+  handle.addEventListener('mousedown', e => {
+    dragging = true; startX = e.clientX;
+    startW = sidebar.getBoundingClientRect().width;
+    handle.classList.add('dragging');
+    document.body.style.cursor = 'col-resize';
+    document.body.style.userSelect = 'none';
+    e.preventDefault();
+  });
+  document.addEventListener('mousemove', e => {
+    if (!dragging) return;
+    sidebar.style.width = Math.min(MAX_W, Math.max(MIN_W, startW + e.clientX - startX)) + 'px';
+  });
+  document.addEventListener('mouseup', () => {
+    if (!dragging) return;
+    dragging = false;
+    handle.classList.remove('dragging');
+    document.body.style.cursor = '';
+    document.body.style.userSelect = '';
+    localStorage.setItem(KEY, Math.round(sidebar.getBoundingClientRect().width));
+  });
+  handle.addEventListener('dblclick', () => {
+    sidebar.style.width = '320px';
+    localStorage.removeItem(KEY);
+  });
+})();
+
+// ── Tab switching ────────────────────────────────────────────────────────────
+function switchTab(tab) {
+  _activeTab = tab;
+  ['overview','fhir','safety'].forEach(t => {
+    document.getElementById('tab-' + t).classList.toggle('active', t === tab);
+    document.getElementById('tab-btn-' + t).classList.toggle('active', t === tab);
+  });
+}
+
+// ── Bootstrap ────────────────────────────────────────────────────────────────
+let _fastPollTimer = null;
+let _fastPollDelay = 500;
+let _hasActive     = false;
+let _lastPollTime  = Date.now();
+let _es            = null;
+const POLL_INTERVAL_S = 30;
+
+(async () => {
+  const seed = await fetchJ('/dashboard/seed').catch(() => null);
+  if (seed) applySeed(seed);
+  await refreshAll();
+  connectStream();
+  requestAnimationFrame(secondTick);
+})();
+
+// Single 1 Hz ticker for the uptime and countdown readouts, driven off
+// requestAnimationFrame so the writes land on the browser's paint cadence
+// and stop entirely while the tab is hidden (rAF doesn't fire then).
+let _lastTick = 0;
+function secondTick() {
+  const now = Date.now();
+  if (now - _lastTick >= 1000) {
+    _lastTick = now;
+    refreshUptime();
+    if (!_cssCountdown) tickCountdown();
+  }
+  requestAnimationFrame(secondTick);
+}
+
+function applySeed(s) {
+  setText('agent-status', s.agent_status);
+  setText('kpi-uptime', s.uptime_str);
+  setStatusTheme(s.status_color, s.status_bg);
+  if (s.last_seen) setText('hb-ts', 'heartbeat ' + fmtTime(s.last_seen));
+  if (s.started_at && !_startedAt) _startedAt = new Date(s.started_at);
+}
+
+let _lastTheme = '';
+function setStatusTheme(color, bg) {
+  // Rewriting custom properties invalidates style on the whole tree —
+  // skip when the theme didn't actually flip
+  if (color + '|' + (bg || '') === _lastTheme) return;
+  _lastTheme = color + '|' + (bg || '');
+  const st = document.documentElement.style;
+  st.setProperty('--status', color);
+  st.setProperty('--status-bg', bg || color + '18');
+  st.setProperty('--status-30', color + '30');
+  st.setProperty('--status-66', color + '66');
+}
+
+// ── SSE stream ───────────────────────────────────────────────────────────────
+// The server pushes health/queue/alerts/activity events only when the
+// underlying state changed — no idle request/response cycles. A slow
+// fallback poll kicks in only while the stream is down.
+function connectStream() {
+  if (!window.EventSource) {
+    setInterval(() => { if (!document.hidden) refreshAll(); }, 3000);
+    return;
+  }
+  _es = new EventSource('/dashboard/stream');
+  _es.addEventListener('health',   e => updateHealth(JSON.parse(e.data)));
+  _es.addEventListener('alerts',   e => updateAlerts(JSON.parse(e.data)));
+  _es.addEventListener('activity', e => updateActivity(JSON.parse(e.data)));
+  _es.addEventListener('queue',    e => {
+    updateQueue(JSON.parse(e.data));
+    _lastPollTime = Date.now();
+    setText('footer-ts', '⚡ live stream · ' + new Date().toLocaleTimeString());
+    refreshSelectedDoc();
+    if (!_selectedDocId && _docs.length) selectDoc(_docs[0].id);
+  });
+  // Self-rescheduling with a random phase (so many tabs opened together
+  // don't align their checks) and error backoff when the backend is down
+  (function checkStream() {
+    const delay = Math.min(8000 * _backoff(3), 60000) + Math.floor(Math.random() * 1000);
+    setTimeout(() => {
+      if (!document.hidden && _es.readyState === EventSource.CLOSED) refreshAll();
+      checkStream();
+    }, delay);
+  })();
+}
+
+// Background tabs do no timer work; on return to the foreground the page
+// catches up immediately instead of waiting for the next event.
+document.addEventListener('visibilitychange', () => {
+  if (!document.hidden) refreshAll();
+});
+window.addEventListener('beforeunload', () => { if (_es) _es.close(); });
+
+function tickCountdown() {
+  if (document.hidden || !_selectedDocId) return;
+  const sel = (_docs || []).find(d => d.id === _selectedDocId);
+  if (!sel || sel.status !== 'pending') return;
+  const remaining = Math.max(0, POLL_INTERVAL_S - Math.floor((Date.now() - _lastPollTime) / 1000));
+  const el = document.getElementById('countdown-val');
+  if (el) el.textContent = remaining;
+}
+
+// ── Master refresh ────────────────────────────────────────────────────────────
+// Consecutive failed refreshes back off every retry loop exponentially
+// (2^streak, capped below) so a down backend isn't hammered at full rate
+let _errStreak = 0;
+const _backoff = (cap) => 1 << Math.min(_errStreak, cap);
+
+async function refreshAll() {
+  const d = await fetchJ('/dashboard/bootstrap?since=' + _lastActSeq).catch(() => undefined);
+  if (d === undefined) { _errStreak++; return; }
+  _errStreak = 0;
+  if (d === null) return; // 304 — nothing changed since the last poll
+  if (d.health)   updateHealth(d.health);
+  if (d.queue)    updateQueue(d.queue);
+  if (d.alerts)   updateAlerts(d.alerts);
+  if (d.activity) updateActivity(d.activity);
+  _lastPollTime = Date.now();
+  setText('footer-ts', '⟳ last refresh ' + new Date().toLocaleTimeString());
+
+  refreshSelectedDoc();
+  if (!_selectedDocId && _docs.length) selectDoc(_docs[0].id);
+}
+
+function refreshSelectedDoc() {
+  if (!_selectedDocId) return;
+  const sel = (_docs || []).find(d => d.id === _selectedDocId);
+  if (!sel) return;
+  if      (sel.status === 'complete')   loadDocResults(_selectedDocId);
+  else if (sel.status === 'processing') showProcessingState(sel);
+  else if (sel.status === 'pending')    showPendingState(sel);
+  else if (sel.status === 'failed')     showFailedState(sel);
+}
+
+// ── Health ────────────────────────────────────────────────────────────────────
+function updateHealth(h) {
+  if (h.started_at && !_startedAt) _startedAt = new Date(h.started_at);
+  scheduleUpdate(() => {
+    setText('kpi-processed', h.documents_processed_total ?? 0);
+    const flags = h.flags_raised_total ?? 0;
+    setText('kpi-flags', flags);
+    const cls = 'kpi-val ' + (flags > 0 ? 'c-red' : 'c-muted');
+    if ($id('kpi-flags').className !== cls) $id('kpi-flags').className = cls;
+    const running = h.status === 'running';
+    setText('agent-status', running ? 'RUNNING' : 'STALLED');
+    setStatusTheme(running ? '#22c55e' : '#ef4444');
+    if (h.heartbeat) setText('hb-ts', 'heartbeat ' + fmtTime(h.heartbeat));
+  });
+}
+
+// ── Queue ─────────────────────────────────────────────────────────────────────
+function updateQueue(q) {
+  _docs = q.recent_documents || [];
+  _thumbRev = q.thumb_rev || null;
+  scheduleUpdate(() => {
+    const s = q.stats || {};
+    setText('q-pending',  s.pending    ?? 0);
+    setText('q-proc',     s.processing ?? 0);
+    setText('q-done',     s.complete   ?? 0);
+    setText('q-fail',     s.failed     ?? 0);
+    setText('kpi-pending', s.pending   ?? 0);
+    setText('kpi-complete', s.complete ?? 0);
+    renderDocList(_docs);
+  });
+}
+
+// ── Alerts ────────────────────────────────────────────────────────────────────
+function updateAlerts(a) {
+  const alerts = a.alerts || [];
+  scheduleUpdate(() => renderAlerts(alerts));
+}
+
+// Rows are cloned from <template> and filled via textContent — no HTML
+// reparse on each tick and no escaping needed for flag/document fields
+let _lastAlertsKey = '';
+function renderAlerts(alerts) {
+  // Steady state is "same alerts as last tick" — skip the rebuild then
+  const key = alerts.length + '|'
+            + alerts.slice(0, 3).map(f => f.id + ':' + f.severity + ':' + f.flag_type).join(';');
+  if (key === _lastAlertsKey) return;
+  _lastAlertsKey = key;
+  const sec = $id('alerts-section');
+  if (!alerts.length) { if (sec.firstChild) sec.replaceChildren(); return; }
+  const tpl = document.getElementById('alert-item-tpl');
+  const frag = document.createDocumentFragment();
+  const label = document.createElement('div');
+  label.className = 'sec-label alerts-label';
+  label.textContent = `⚠ Alerts (${alerts.length})`;
+  frag.appendChild(label);
+  for (const f of alerts.slice(0, 3)) {
+    const node = tpl.content.firstElementChild.cloneNode(true);
+    node.querySelector('.alert-sev').textContent = `${f.severity} · ${f.flag_type}`;
+    node.querySelector('.alert-det').textContent =
+      f.details.slice(0, 100) + (f.details.length > 100 ? '…' : '');
+    node.querySelector('.alert-src').textContent = `${f.filename || ''} · ${fmtTime(f.timestamp)}`;
+    frag.appendChild(node);
+  }
+  if (alerts.length > 3) {
+    const more = document.createElement('div');
+    more.className = 'alerts-more';
+    more.append(`+${alerts.length - 3} more — `);
+    const link = document.createElement('a');
+    link.href = '/alerts';
+    link.textContent = 'view all';
+    more.appendChild(link);
+    frag.appendChild(more);
+  }
+  sec.replaceChildren(frag);
+}
+
+// ── Document list ─────────────────────────────────────────────────────────────
+let _docListKey = '';
+function renderDocList(docs) {
+  const el = document.getElementById('doc-list');
+  if (!docs.length) {
+    if (_docListKey === 'empty') return;
+    _docListKey = 'empty';
+    el.innerHTML = `<div style="color:var(--muted);font-size:11px;text-align:center;padding:24px 0;line-height:1.6">
+      No documents yet<br/><span style="color:var(--dim)">Upload one or inject a test batch</span></div>`;
+    return;
+  }
+  // Rebuilding the list trashes the DOM and reloads every thumbnail, so
+  // skip it when nothing the rows display has changed
+  const key = _selectedDocId + '&' + _thumbRev + '&' + docs.map(d =>
+    d.id + '|' + d.status + '|' + (d.critical_flags_count || 0) + '|' + d.uploaded_at
+  ).join(';');
+  if (key === _docListKey) return;
+  _docListKey = key;
+  const tpl = document.getElementById('doc-row-tpl');
+  // Keyed reuse: rows carry their doc id, so a refresh re-parents the
+  // existing nodes in the new order and only rows whose data actually
+  // changed get field writes — a selection flip is two classList toggles
+  const prev = new Map();
+  for (const child of el.children) if (child.id) prev.set(child.id, child);
+  const frag = document.createDocumentFragment();
+  for (const d of docs) {
+    let node = prev.get('di-' + d.id);
+    if (!node) {
+      node = tpl.content.firstElementChild.cloneNode(true);
+      node.id = 'di-' + d.id;
+      node.onclick = () => selectDoc(d.id);
+    }
+    node.classList.toggle('active', d.id === _selectedDocId);
+    if (d.id === _selectedDocId) _activeDocEl = node;
+    const rowKey = d.status + '|' + (d.critical_flags_count || 0) + '|'
+                 + (d.thumb_idx ?? '') + '|' + _thumbRev;
+    if (node.dataset.key !== rowKey) {
+      node.dataset.key = rowKey;
+      // Thumbnails come from one shared sprite sheet (see /intake/thumbs.webp)
+      // addressed by cell index — the queue payload carries no image bytes
+      const th = node.querySelector('.doc-thumb');
+      const ph = node.querySelector('.doc-thumb-ph');
+      if (d.thumb_idx != null && _thumbRev) {
+        th.style.backgroundImage = `url('/intake/thumbs.webp?rev=${_thumbRev}')`;
+        th.style.backgroundPosition = `-${d.thumb_idx * 36}px 0`;
+        th.style.display = '';
+        ph.style.display = 'none';
+      } else {
+        th.style.display = 'none';
+        ph.style.display = '';
+      }
+      const name = node.querySelector('.doc-name');
+      name.textContent = d.filename;
+      name.title = d.filename;
+      const sc = statusColor(d.status);
+      const pill = node.querySelector('.status-pill');
+      pill.textContent = d.status;
+      pill.style.cssText = `background:${sc}18;color:${sc};border:1px solid ${sc}35`;
+      node.querySelector('.doc-flag-badge').textContent =
+        d.critical_flags_count > 0 ? `⚠ ${d.critical_flags_count}` : '';
+      node.querySelector('.doc-time').textContent = fmtTime(d.uploaded_at);
+    }
+    frag.appendChild(node);
+  }
+  el.replaceChildren(frag);
+}
+
+// ── Select doc ────────────────────────────────────────────────────────────────
+let _activeDocEl = null;
+async function selectDoc(id) {
+  _selectedDocId = id;
+  // Two targeted class writes instead of scanning every rendered row
+  if (_activeDocEl) _activeDocEl.classList.remove('active');
+  const row = document.getElementById('di-' + id);
+  if (row) row.classList.add('active');
+  _activeDocEl = row;
+  const doc = _docs.find(d => d.id === id);
+  if (!doc) return;
+  setText('detail-title', doc.filename);
+  setText('img-caption-name', doc.filename);
+  setText('img-caption-meta', 'Uploaded ' + fmtTime(doc.uploaded_at));
+  const sc = statusColor(doc.status);
+  document.getElementById('detail-badge').innerHTML =
+    `<span class="status-pill" style="background:${sc}18;color:${sc};border:1px solid ${sc}35;padding:4px 12px;font-size:11px">${doc.status}</span>`;
+  document.getElementById('detail-sub').textContent =
+    doc.processed_at ? 'Processed ' + fmtTime(doc.processed_at) :
+    doc.uploaded_at  ? 'Uploaded '  + fmtTime(doc.uploaded_at)  : '';
+  if      (doc.status === 'pending')    showPendingState(doc);
+  else if (doc.status === 'processing') showProcessingState(doc);
+  else if (doc.status === 'failed')     showFailedState(doc);
+  else if (doc.status === 'complete')   debouncedLoadResults(id);
+}
+
+// Rapid click-through fires one fetch per stop, not per selection: the
+// results load is debounced 150ms and any in-flight request for a
+// previous selection is aborted.
+let _selTimer = null;
+let _selAbort = null;
+
+function debouncedLoadResults(id) {
+  clearTimeout(_selTimer);
+  _selTimer = setTimeout(() => {
+    if (_selAbort) _selAbort.abort();
+    _selAbort = new AbortController();
+    loadDocResults(id, _selAbort.signal);
+  }, 150);
+}
+
+// Every state renderer calls these on each flip — track what's already
+// on screen so repeat calls cost nothing (and don't refetch the image)
+let _detailShown = false;
+let _curImgId = null;
+
+function _showDetail() {
+  if (_detailShown) return;
+  _detailShown = true;
+  document.getElementById('empty-state').style.display = 'none';
+  document.getElementById('detail-view').style.display = 'flex';
+}
+
+function _loadDocImage(id) {
+  if (_curImgId === id) return;
+  const img = document.getElementById('doc-img');
+  const ph  = document.getElementById('img-ph');
+  if (!img) return;
+  _curImgId = id;
+  img.decoding = 'async';
+  img.src = '/intake/' + id + '/image?' + Date.now();
+  img.style.display = '';
+  if (ph) ph.style.display = 'none';
+}
+
+// ── State panels ─────────────────────────────────────────────────────────────
+// The three interim state cards are cloned from <template>s — no HTML
+// string parse per refresh — and skipped entirely when the panel is
+// already showing that state for that document
+let _summaryState = '';
+
+function applyStateCard(tplId, key) {
+  if (key === _summaryState) return false;
+  _summaryState = key;
+  const t = document.getElementById(tplId).content.cloneNode(true);
+  document.getElementById('summary-panel').replaceChildren(t);
+  return true;
+}
+
+function showPendingState(doc) {
+  _showDetail(); _loadDocImage(doc.id); switchTab('overview');
+  if (!applyStateCard('tpl-pending', doc.id + ':pending')) return;
+  setFhirHTML($id('fhir-json'), '<span style="color:var(--muted)">Waiting for results…</span>');
+  document.getElementById('valid-body').innerHTML = '<div style="color:var(--muted);font-size:11px">Waiting for results…</div>';
+  startCountdown();
+}
+
+// The countdown digits come from a CSS counter animation where supported
+// — JS only seeds the phase via a negative animation-delay. Browsers
+// without @property fall back to the 1 Hz ticker.
+const _cssCountdown = typeof CSS !== 'undefined' && typeof CSS.registerProperty === 'function';
+
+function startCountdown() {
+  const el = document.getElementById('countdown-val');
+  if (!el) return;
+  if (_cssCountdown) {
+    const elapsed = Math.min(POLL_INTERVAL_S, (Date.now() - _lastPollTime) / 1000);
+    el.classList.add('cd-anim');
+    el.style.animationDelay = -elapsed + 's';
+  } else {
+    el.textContent = '—';
+    tickCountdown();
+  }
+}
+
+function showProcessingState(doc) {
+  _showDetail(); _loadDocImage(doc.id); switchTab('overview');
+  if (!applyStateCard('tpl-processing', doc.id + ':processing')) return;
+  setFhirHTML($id('fhir-json'), '<span style="color:var(--muted)">Building FHIR bundle…</span>');
+  document.getElementById('valid-body').innerHTML = '<div style="color:var(--muted);font-size:11px">Running safety checks…</div>';
+}
+
+function showFailedState(doc) {
+  _showDetail(); _loadDocImage(doc.id); switchTab('overview');
+  const msg = doc.error_message || 'An error occurred during pipeline execution. Check the activity log for details.';
+  if (!applyStateCard('tpl-failed', doc.id + ':failed:' + msg)) return;
+  document.querySelector('#summary-panel [data-bind=error]').textContent = msg;
+  setFhirHTML($id('fhir-json'), '<span style="color:var(--muted)">No results — processing failed.</span>');
+  document.getElementById('valid-body').innerHTML = '<div style="color:var(--muted);font-size:11px">No results — processing failed.</div>';
+}
+
+// ── Process Now ───────────────────────────────────────────────────────────────
+// Adaptive poll after a manual trigger: 500ms while the agent reports
+// active work, decaying by 1.5× to a 10s ceiling when idle, with ±200ms
+// jitter so simultaneous tabs don't poll in lockstep. Once fully decayed
+// with a healthy event stream, the loop stops — SSE covers steady state.
+function startFastPoll() {
+  if (_fastPollTimer) clearTimeout(_fastPollTimer);
+  _fastPollDelay = 500;
+  scheduleFastPoll();
+}
+
+function scheduleFastPoll() {
+  const base = _hasActive ? 500 : Math.min(_fastPollDelay * 1.5, 10000);
+  _fastPollDelay = base;
+  if (!_hasActive && base >= 10000 && _es && _es.readyState === EventSource.OPEN) {
+    _fastPollTimer = null;
+    return;
+  }
+  const jitter = (Math.random() - 0.5) * 400;
+  _fastPollTimer = setTimeout(async () => {
+    if (!document.hidden) await refreshAll();
+    scheduleFastPoll();
+  }, Math.min(base * _backoff(5), 60000) + jitter);
+}
+
+async function processNow() {
+  const btn = document.getElementById('process-now-btn');
+  if (btn) { btn.disabled = true; btn.innerHTML = '⚙️&nbsp; Triggering…'; }
+  try {
+    const r = await fetch('/agent/process-now', {method: 'POST'});
+    if (r.ok) {
+      if (btn) btn.innerHTML = '✔&nbsp; Triggered — watch activity feed';
+      _lastPollTime = Date.now();
+      startFastPoll();
+    } else {
+      if (btn) { btn.disabled = false; btn.innerHTML = '▶&nbsp; Process Now'; }
+    }
+  } catch(e) {
+    if (btn) { btn.disabled = false; btn.innerHTML = '▶&nbsp; Process Now'; }
+  }
+}
+
+// ── Load results ─────────────────────────────────────────────────────────────
+// Results for finished documents are immutable — keep them with their
+// ETag, revalidate with If-None-Match, and for a terminal doc seen in
+// the last few minutes skip the network entirely
+const _resCache = new Map();
+const _RES_TTL_MS = 300000;
+
+async function fetchResults(id, signal) {
+  const doc = (_docs || []).find(d => d.id === id);
+  const terminal = doc && (doc.status === 'complete' || doc.status === 'failed');
+  const cached = _resCache.get(id);
+  if (cached && terminal && Date.now() - cached.ts < _RES_TTL_MS) return cached.data;
+  const r = await fetch('/intake/' + id + '/results', {
+    headers: cached && cached.etag ? { 'If-None-Match': cached.etag } : {},
+    signal,
+  });
+  if (r.status === 304 && cached) { cached.ts = Date.now(); return cached.data; }
+  if (!r.ok) throw new Error(r.status);
+  const data = await r.json();
+  _resCache.set(id, { etag: r.headers.get('etag'), data, ts: Date.now() });
+  return data;
+}
+
+async function loadDocResults(id, signal) {
+  _showDetail();
+  _loadDocImage(id);
+  const data = await fetchResults(id, signal).catch(() => null);
+  if (!data || id !== _selectedDocId) return;
+  renderSummary(data);
+  renderFhir(data.fhir_bundle,
+             data.document && data.document.id + ':' + (data.document.processed_at || ''),
+             data.fhir_bundle_html);
+  renderValidation(data.validation, data.safety_flags);
+  const val = data.validation || {};
+  const ok  = val.overall_passed;
+  const bc  = ok ? 'var(--accent)' : 'var(--warn)';
+  document.getElementById('detail-badge').innerHTML =
+    `<span class="status-pill" style="background:${bc}18;color:${bc};border:1px solid ${bc}35;padding:4px 12px;font-size:11px">
+      ${ok ? '✓ PASSED' : '⚠ REVIEW'} ${val.passed_count ?? 0}/${val.total_count ?? 0}
+    </span>`;
+}
+
+// ── Summary ───────────────────────────────────────────────────────────────────
+// The summary grid is a fixed skeleton cloned once from its template;
+// updates are plain textContent writes into the existing nodes, and the
+// flag lists reuse pooled children instead of regenerating markup
+function syncChildren(host, items, make, update) {
+  while (host.children.length > items.length) host.lastChild.remove();
+  while (host.children.length < items.length) host.appendChild(make());
+  items.forEach((it, i) => update(host.children[i], it));
+}
+
+function renderSummary(data) {
+  const ex  = data.extraction_summary || {};
+  const st  = data.standardization    || {};
+  const icd = st.icd10 || {};
+  const conf    = ex.overall_confidence;
+  const confPct = conf != null ? (conf * 100).toFixed(0) + '%' : '—';
+  const confColor = conf != null && conf > 0.8 ? 'var(--accent)' : 'var(--warn)';
+  const flags   = ex.flags || [];
+  const sfFlags = st.safety_flags || [];
+
+  if (_summaryState !== 'summary') {
+    _summaryState = 'summary';
+    document.getElementById('summary-panel').replaceChildren(
+      document.getElementById('tpl-summary').content.cloneNode(true));
+  }
+  const hosp = $id('sv-hosp');
+  hosp.textContent = ex.hospital?.name || '—';
+  hosp.title = ex.hospital?.name || '';
+  setText('sv-unit', ex.hospital?.unit || '—');
+  const diag = $id('sv-diag');
+  diag.textContent = ex.diagnosis || '—';
+  diag.title = ex.diagnosis || '';
+  setText('sv-icd', icd.code || '—');
+  setText('sv-reg', ex.regimen || '—');
+  setText('sv-cycles', ex.cycles_count ?? '—');
+  const confEl = $id('sv-conf');
+  confEl.textContent = confPct;
+  confEl.style.color = confColor;
+  setText('sv-docid', (data.document?.id || '').slice(0, 8) + '…');
+
+  $id('sv-vision-wrap').hidden = !flags.length;
+  syncChildren($id('sv-vision'), flags,
+    () => {
+      const s = document.createElement('span');
+      s.className = 'flag-tag';
+      return s;
+    },
+    (el, f) => { el.textContent = String(f); });
+
+  $id('sv-clin-wrap').hidden = !sfFlags.length;
+  syncChildren($id('sv-clin'), sfFlags,
+    () => {
+      const d = document.createElement('div');
+      d.className = 'clin-flag';
+      const sev = document.createElement('span');
+      sev.className = 'clin-sev';
+      const desc = document.createElement('span');
+      desc.className = 'clin-desc';
+      d.append(sev, desc);
+      return d;
+    },
+    (el, f) => {
+      el.firstChild.textContent = f.severity;
+      el.lastChild.textContent = f.description || '';
+    });
+}
+
+// ── FHIR ──────────────────────────────────────────────────────────────────────
+// Highlighted bundles are memoized per document generation — re-clicking
+// a processed doc skips the stringify + highlight entirely
+const _fhirCache = new Map();
+const _FHIR_CACHE_MAX = 50;
+
+function renderFhir(bundle, key, preHtml) {
+  _fhirData = bundle;
+  const el = $id('fhir-json');
+  if (!bundle) {
+    setFhirHTML(el, '<span style="color:var(--muted)">No FHIR data</span>');
+    return;
+  }
+  // The server ships the bundle pre-highlighted; syntaxHL is the
+  // fallback for payloads that predate that field
+  let html = preHtml || (key ? _fhirCache.get(key) : null);
+  if (html == null) {
+    html = syntaxHL(JSON.stringify(bundle, null, 2));
+    if (key) {
+      if (_fhirCache.size >= _FHIR_CACHE_MAX) _fhirCache.delete(_fhirCache.keys().next().value);
+      _fhirCache.set(key, html);
+    }
+  }
+  setFhirHTML(el, html);
+}
+
+// Large bundles are inserted in ~8KB slices during idle time, split on
+// line boundaries so each slice is well-formed markup — one monolithic
+// innerHTML parse of a big bundle would jank the whole dashboard.
+const _FHIR_CHUNK = 8192;
+let _fhirRenderToken = 0;
+
+function setFhirHTML(el, html) {
+  const token = ++_fhirRenderToken;
+  if (html.length <= _FHIR_CHUNK * 2 || typeof requestIdleCallback !== 'function') {
+    el.innerHTML = html;
+    return;
+  }
+  el.innerHTML = '';
+  let pos = 0;
+  function step(deadline) {
+    if (token !== _fhirRenderToken) return;  // superseded by a newer render
+    while (pos < html.length && deadline.timeRemaining() > 2) {
+      let end = pos + _FHIR_CHUNK;
+      if (end < html.length) {
+        const nl = html.indexOf('\n', end);
+        end = nl === -1 ? html.length : nl + 1;
+      }
+      el.insertAdjacentHTML('beforeend', html.slice(pos, end));
+      pos = end;
+    }
+    if (pos < html.length) requestIdleCallback(step);
+  }
+  requestIdleCallback(step);
+}
+
+// One combined alternation: key, string, number or literal — classified
+// in a single scan instead of five sequential whole-string replaces
+const JSON_TOK = /("(?:[^"\\]|\\.)*")(\s*:)?|(-?\d+\.?\d*(?:[eE][+-]?\d+)?)|\b(true|false|null)\b/g;
+
+function syntaxHL(json) {
+  json = json.replace(/&/g,'&amp;').replace(/</g,'&lt;').replace(/>/g,'&gt;');
+  return json.replace(JSON_TOK, (m, str, colon, num, lit) => {
+    if (str) {
+      const v = str.slice(1, -1);
+      if (colon) return `"<span class="jk">${v}</span>"${colon}`;
+      return `"<span class="${/^[A-Z]\d{2}/.test(v) ? 'jicd' : 'js'}">${v}</span>"`;
+    }
+    if (num) return `<span class="jn">${num}</span>`;
+    return `<span class="${lit === 'null' ? 'jnull' : 'jb'}">${lit}</span>`;
+  });
+}
+
+function copyFhir() {
+  if (!_fhirData) return;
+  navigator.clipboard.writeText(JSON.stringify(_fhirData, null, 2));
+  const btn = document.querySelector('.copy-btn');
+  btn.textContent = '✓ Copied!';
+  setTimeout(() => btn.textContent = 'Copy JSON', 1800);
+}
+
+// ── Validation ────────────────────────────────────────────────────────────────
+// Rows clone <template>s and fill via textContent — no HTML reparse,
+// no escaping needed
+const _vTpl = id => document.getElementById(id).content.firstElementChild.cloneNode(true);
+
+function renderValidation(val, dbFlags) {
+  const body = document.getElementById('valid-body');
+  if (!val || !val.checks) {
+    body.innerHTML = '<div style="color:var(--muted);font-size:11px">No validation data</div>';
+    return;
+  }
+  const passed = val.passed_count, total = val.total_count;
+  const pct = total ? Math.round((passed/total)*100) : 0;
+  const summaryColor = val.overall_passed ? 'var(--accent)' : 'var(--err)';
+  const frag = document.createDocumentFragment();
+
+  const sum = _vTpl('tpl-valid-summary');
+  const score = sum.querySelector('.vsum-score');
+  score.textContent = passed + '/' + total;
+  score.style.color = summaryColor;
+  const verdict = sum.querySelector('.vsum-verdict');
+  verdict.textContent = val.overall_passed ? '✓ All Checks Passed' : '⚠ Review Required';
+  verdict.style.color = summaryColor;
+  sum.querySelector('.vsum-pct').textContent = pct + '% compliance';
+  frag.appendChild(sum);
+
+  const doseCheck = val.checks.find(c => c.name === 'Dose Consistency' && !c.passed);
+  if (doseCheck) {
+    const alert = _vTpl('tpl-dose-alert');
+    alert.querySelector('.dose-alert-body').textContent = doseCheck.detail;
+    frag.appendChild(alert);
+  }
+
+  for (const c of val.checks) {
+    const row = _vTpl('tpl-check-row');
+    row.classList.add(c.passed ? 'ok' : 'fail');
+    row.querySelector('.check-icon').textContent = c.passed ? '✅' : '❌';
+    const name = row.querySelector('.check-name');
+    name.textContent = c.name;
+    name.style.color = c.passed ? 'var(--accent)' : 'var(--err)';
+    row.querySelector('.check-det').textContent = c.detail;
+    frag.appendChild(row);
+  }
+
+  if (dbFlags && dbFlags.length) {
+    const label = document.createElement('div');
+    label.className = 'raised-label';
+    label.textContent = 'Raised Flags';
+    frag.appendChild(label);
+    for (const f of dbFlags) {
+      const flag = _vTpl('tpl-raised-flag');
+      flag.querySelector('.raised-flag-type').textContent = f.severity + ' · ' + f.flag_type;
+      flag.querySelector('.raised-flag-det').textContent = f.details;
+      if (f.resolved) flag.querySelector('.raised-flag-res').hidden = false;
+      frag.appendChild(flag);
+    }
+  }
+
+  body.replaceChildren(frag);
+}
+
+// ── Upload ────────────────────────────────────────────────────────────────────
+const dropZone = document.getElementById('drop-zone');
+const fileInput = document.getElementById('file-input');
+dropZone.addEventListener('dragover', e => { e.preventDefault(); dropZone.classList.add('over'); });
+dropZone.addEventListener('dragleave', () => dropZone.classList.remove('over'));
+dropZone.addEventListener('drop', e => { e.preventDefault(); dropZone.classList.remove('over'); uploadFiles(e.dataTransfer.files); });
+fileInput.addEventListener('change', () => { if (fileInput.files.length) uploadFiles(fileInput.files); fileInput.value=''; });
+
+// Uploads run through a small worker pool — up to 6 requests in flight
+// instead of one RTT-serialized POST per file
+const UPLOAD_CONCURRENCY = 6;
+
+async function uploadFiles(files) {
+  const arr = Array.from(files);
+  setUploadStatus('loading', 'Uploading ' + arr.length + ' file' + (arr.length>1?'s':'') + '…');
+  let ok=0, fail=0, lastId=null, next=0;
+  async function worker() {
+    while (next < arr.length) {
+      const file = arr[next++];
+      try {
+        const fd = new FormData();
+        fd.append('file', file);
+        const r = await fetch('/intake', {method:'POST', body:fd});
+        if (r.ok) { ok++; const d = await r.json(); lastId = d.document_id || lastId; }
+        else fail++;
+      } catch(e) { fail++; }
+    }
+  }
+  await Promise.all(Array.from({length: Math.min(UPLOAD_CONCURRENCY, arr.length)}, worker));
+  if (fail === 0) setUploadStatus('ok', '✓ ' + ok + ' doc' + (ok>1?'s':'') + ' queued — click Process Now or wait 30s');
+  else setUploadStatus('err', ok + ' queued, ' + fail + ' failed');
+  await refreshAll();
+  if (lastId) selectDoc(lastId);
+}
+
+async function runSimulate() {
+  const btn = document.getElementById('sim-btn');
+  btn.disabled = true;
+  setUploadStatus('loading', 'Injecting test batch…');
+  try {
+    const r = await fetch('/intake/simulate');
+    const d = await r.json();
+    setUploadStatus('ok', '✓ ' + d.queued_count + ' docs injected — click Process Now or wait for auto-pickup');
+    await refreshAll();
+    const firstId = d.document_ids && d.document_ids[0];
+    if (firstId) selectDoc(firstId);
+  } catch(e) {
+    setUploadStatus('err', 'Failed: ' + e.message);
+  } finally {
+    setTimeout(() => { btn.disabled = false; }, 3000);
+  }
+}
+
+function setUploadStatus(type, msg) {
+  const el = document.getElementById('upload-status');
+  el.className = 'upload-status ' + (type==='ok'?'us-ok':type==='err'?'us-err':'us-loading');
+  el.textContent = msg;
+  if (type !== 'loading') setTimeout(() => { if (el.textContent === msg) el.textContent = ''; }, 8000);
+}
+
+// ── Activity feed ─────────────────────────────────────────────────────────────
+// refreshAll sends the id of the newest rendered entry, so the server
+// answers with just the activity delta (usually empty), not 80 rows.
+let _actEntries = [];
+let _lastActSeq = 0;
+
+function updateActivity(data) {
+  _hasActive = !!data.has_active;
+  if (data.delta) {
+    // Still fall through on an empty delta — the active bar and event
+    // count render from has_active/queue_stats, which may have changed
+    const fresh = (data.entries || []).filter(e => e.id > _lastActSeq);
+    if (fresh.length) _actEntries = _actEntries.concat(fresh).slice(-80);
+  } else {
+    _actEntries = data.entries || [];
+  }
+  if (_actEntries.length) _lastActSeq = _actEntries[_actEntries.length - 1].id || 0;
+  scheduleUpdate(() => renderActivity({ ...data, entries: _actEntries }));
+}
+
+// Rows already on screen are left alone — each tick appends only entries
+// whose id is newer than the last rendered one, so DOM work is O(delta)
+let _renderedMaxSeq = 0;
+
+function renderActivity(data) {
+  const scroll = $id('act-scroll');
+  const bar    = $id('act-active-bar');
+  const status = $id('act-status');
+  status.textContent = data.entries.length + ' events';
+  if (data.has_active) {
+    bar.style.display = 'flex';
+    // Walk backwards — the match is typically near the end, and this
+    // avoids the array copy slice().reverse().find() would allocate
+    let latest = null;
+    for (let i = data.entries.length - 1; i >= 0; i--) {
+      if (data.entries[i].event === 'stage_start') { latest = data.entries[i]; break; }
+    }
+    setText('act-active-msg', latest ? latest.message.replace('⏳ ','') : 'Processing…');
+  } else {
+    bar.style.display = 'none';
+  }
+  if (!data.entries.length) {
+    _renderedMaxSeq = 0;
+    scroll.innerHTML = '<div class="act-empty">Waiting for agent activity…</div>';
+    return;
+  }
+  const maxSeq = data.entries[data.entries.length - 1].id || 0;
+  // Rebuild only when the feed regressed (agent restart, stream reconnect)
+  const rebuild = _renderedMaxSeq === 0 || maxSeq < _renderedMaxSeq;
+  const rows = rebuild ? data.entries : data.entries.filter(e => (e.id || 0) > _renderedMaxSeq);
+  if (!rows.length && !rebuild) return;
+  const wasAtBottom = scroll.scrollHeight - scroll.scrollTop <= scroll.clientHeight + 40;
+  if (rebuild) scroll.replaceChildren();
+  const frag = document.createDocumentFragment();
+  for (const e of rows) frag.appendChild(actRow(e));
+  scroll.appendChild(frag);
+  while (scroll.children.length > 80) scroll.firstChild.remove();
+  _renderedMaxSeq = maxSeq;
+  if (wasAtBottom) scroll.scrollTop = scroll.scrollHeight;
+}
+
+function actRow(e) {
+  const div = document.createElement('div');
+  div.className = 'act-row level-' + (e.level || 'info');
+  const ts = document.createElement('span');
+  ts.className = 'act-ts';
+  ts.textContent = fmtTime(e.timestamp_ms || e.timestamp);
+  const msg = document.createElement('span');
+  msg.className = 'act-msg';
+  msg.textContent = e.message;
+  div.append(ts, msg);
+  if (e.stage) {
+    const stage = document.createElement('span');
+    stage.className = 'act-stage';
+    stage.textContent = e.stage;
+    div.appendChild(stage);
+  }
+  return div;
+}
+
+// ── Uptime ────────────────────────────────────────────────────────────────────
+let _lastUptimeKey = -1;
+function refreshUptime() {
+  if (document.hidden || !_startedAt) return;
+  const s = Math.floor((Date.now() - _startedAt) / 1000);
+  // Past the first hour the label only has minute resolution — skip the
+  // 59 per-minute reformats that would come out identical anyway
+  const key = s >= 3600 ? Math.floor(s / 60) : s;
+  if (key === _lastUptimeKey) return;
+  _lastUptimeKey = key;
+  const h = Math.floor(s/3600), m = Math.floor((s%3600)/60), sec = s%60;
+  setText('kpi-uptime', h > 0 ? h+'h '+m+'m' : m > 0 ? m+'m '+sec+'s' : sec+'s');
+}
+
+// ── Utils ─────────────────────────────────────────────────────────────────────
+// Timestamps repeat across renders (doc rows, activity rows). A reused
+// Intl.DateTimeFormat beats per-call toLocaleTimeString, epoch millis
+// (sent by the server for activity rows) skip ISO parsing entirely, and
+// the memo covers repeated ISO strings from older payload shapes.
+const _tfmt = new Intl.DateTimeFormat('en-US', {hour:'2-digit',minute:'2-digit',second:'2-digit'});
+const _fmtCache = new Map();
+function fmtTime(ts) {
+  if (!ts) return '—';
+  if (typeof ts === 'number') return _tfmt.format(ts);
+  let out = _fmtCache.get(ts);
+  if (out === undefined) {
+    try { out = _tfmt.format(new Date(ts)); }
+    catch(e) { out = ts; }
+    if (_fmtCache.size >= 500) _fmtCache.delete(_fmtCache.keys().next().value);
+    _fmtCache.set(ts, out);
+  }
+  return out;
+}
+function statusColor(s) {
+  return {pending:'#6b7280',processing:'#3b82f6',complete:'#22c55e',failed:'#ef4444'}[s]||'#64748b';
+}
+// setText batches itself: writes land in a Map (later values overwrite
+// earlier ones for the same id) flushed in one animation frame, and
+// unchanged values never touch the DOM at all.
+const _textWrites = new Map();
+let _textRaf = null;
+function setText(id, val) {
+  _textWrites.set(id, val);
+  if (_textRaf) return;
+  _textRaf = requestAnimationFrame(() => {
+    _textRaf = null;
+    for (const [wid, v] of _textWrites) {
+      const el = $id(wid);
+      if (el && el.textContent !== String(v)) el.textContent = v;
+    }
+    _textWrites.clear();
+  });
+}
+// Conditional GETs: remember each URL's ETag and send If-None-Match, so
+// an unchanged payload costs a body-less 304 and no JSON parse. Callers
+// get null back for "no change".
+const _etags = new Map();
+async function fetchJ(url) {
+  const tag = _etags.get(url);
+  const r = await fetch(url, tag ? { headers: { 'If-None-Match': tag } } : undefined);
+  if (r.status === 304) return null;
+  if (!r.ok) throw new Error(r.status);
+  const et = r.headers.get('etag');
+  if (et) {
+    if (_etags.size > 50) _etags.clear();
+    _etags.set(url, et);
+  }
+  return r.json();
+}